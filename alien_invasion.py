@@ -1,34 +1,88 @@
+import os
 import sys
-from time import sleep
 import random
+import argparse
+from concurrent.futures import ThreadPoolExecutor
+from time import perf_counter
 
 import pygame
 
-from settings import Settings
-from game_stats import GameStats
+from assets import assets, sprite_image_paths
+from asset_cache import use_asset_cache
+from settings import Settings, bg_image_path
+from game_stats import (GameStats, PLAYING, RESPAWNING, LEVEL_TRANSITION,
+                        GAME_OVER, WON)
 from scoreboard import Scoreboard
 from events import Events
-from levels import load_level_data
+from levels import load_level_data, level_pack
 from sound import Sound
+from profiler import Profiler, NullProfiler, ProfilerOverlay
+from renderer import create_renderer
 from button import Button
+from controller import KeyboardController, Autopilot
 from ship import Ship
-from bullet import PlayerBullet, EnemyBullet
-from powerup import LifePowerUp, WeaponPowerUp, ShieldPowerUp
+from bullet import Bullets, PLAYER, ENEMY
+from powerup import LifePowerUp, WeaponPowerUp, ShieldPowerUp, Powerups
+from fleet import Fleet
 from enemy import Enemy
+from broadphase import CollisionCounters
+from replay import Recorder, Replay, UI_KEYS
+from step_clock import StepClock, display_refresh_rate
 
 
 class AlienInvasion:
     """Overall class to manage game assets and behaviour."""
 
-    def __init__(self):
-        """Initialize the game, and create game resources."""
-        pygame.init()
+    def __init__(self, headless=False, render_mode=None, seed=None,
+                 loader_threads=None, asset_cache=None):
+        """Initialize the game, and create game resources.
+
+        A headless game has no window and no audio, and is advanced
+        with step() as fast as the CPU allows. render_mode,
+        loader_threads and asset_cache override settings.render_mode,
+        settings.asset_loader_threads and settings.use_asset_cache.
+        Everything random in the game comes from self.random, seeded
+        with seed (a random one if it's None).
+        """
+        # When the game was created, showed its first frame and became
+        # ready to play, for the startup benchmark.
+        self.startup_times = {'created': perf_counter()}
+        self.headless = headless
+        if headless:
+            os.environ['SDL_VIDEODRIVER'] = 'dummy'
+            os.environ['SDL_AUDIODRIVER'] = 'dummy'
+        # Only what the Play screen needs; the mixer is started by Sound.
+        pygame.display.init()
+        pygame.font.init()
         self.settings = Settings()
+        if render_mode:
+            self.settings.render_mode = render_mode
+        if loader_threads is not None:
+            self.settings.asset_loader_threads = loader_threads
+        if asset_cache is not None:
+            self.settings.use_asset_cache = asset_cache
+        # The simulation time in ms, advanced by a fixed timestep.
+        self.sim_time = 0
+        self.frame = 0
+        self.moved = False
+        if seed is None:
+            seed = random.randrange(2 ** 63)
+        self.seed = seed
+        self.random = random.Random(seed)
+        # Records the session, or plays a recorded one back.
+        self.recorder = None
+        self.replay = None
+        # Times the stages of every frame when profiling.
+        self.profiler = NullProfiler()
+        self.profiler_overlay = None
+        # Flies the ship: the player at the keyboard, or the autopilot.
+        self.controller = None
 
         self.screen = pygame.display.set_mode((
             self.settings.screen_width, self.settings.screen_height))
         pygame.display.set_caption('Alien Invasion')
-        self.settings.load_bg()
+        if self.settings.use_asset_cache:
+            use_asset_cache()
 
         # Make the play button
         self.play_button = Button(self, "Play")
@@ -36,39 +90,137 @@ class AlienInvasion:
         # Create an instance to store the game statistics & a scoreboard.
         self.stats = GameStats(self)
         self.sb = Scoreboard(self)
-        self.events = Events(self)
-
         self.ship = Ship(self)
-        self.ship_bullets = pygame.sprite.Group()
-        self.enemies = pygame.sprite.Group()
-        self.enemies_bullets = pygame.sprite.Group()
-        self.powerups = pygame.sprite.Group()
-
+        self.controller = KeyboardController(self)
+        self.bullets = Bullets(self)
+        self.enemies = Fleet(self)
+        self.powerups = Powerups(self)
+        self.powerup_counters = CollisionCounters()
+        # The timers of the game, on the simulation time.
+        self.events = Events(self)
+        # Builds the fleet of the next level while this one is played,
+        # as (level, future).
+        self.level_loader = ThreadPoolExecutor(max_workers=1)
+        self.next_fleet = None
+
+        # Load the sounds and the rest of the images while the Play
+        # screen is shown, and the background last.
+        threads = self.settings.asset_loader_threads
+        self.asset_loader = ThreadPoolExecutor(threads) if threads else None
+        self.ready = False
+        if self.asset_loader:
+            assets.load_in_background(
+                sprite_image_paths() + [bg_image_path()], self.asset_loader)
+            self.settings.blank_bg()
         # Add music to the game.
-        self.sound = Sound()
+        self.sound = Sound(self.settings, enabled=not headless,
+                           loader=self.asset_loader)
+        if not self.asset_loader:
+            self._check_loading(wait=True)
 
-        self._create_fleet()
+        self.renderer = create_renderer(self)
+
+        if os.environ.get(self.settings.profile_env_var) and not headless:
+            self._toggle_profiling()
 
     def run_game(self):
-        """Start the main loop for the game."""
+        """Start the main loop for the game: fixed steps, and frames
+        drawn at the display rate."""
         clock = pygame.time.Clock()
-        while True:
-            clock.tick(self.settings.FPS)
+        self.step_clock = StepClock(self.settings)
+        render_fps = self.settings.render_fps or display_refresh_rate()
+        while not self._replay_over():
+            elapsed = clock.tick(render_fps)
+            self.profiler.start_frame()
+            for _ in range(self.step_clock.tick(elapsed)):
+                if self._replay_over():
+                    break
+                self.step()
+            if self.step_clock.should_draw():
+                self._update_screen(self.step_clock.alpha)
+            self.profiler.end_frame()
+            self._prefetch_next_level()
+
+    def _replay_over(self):
+        return self.replay is not None and self.frame >= self.replay.frames
+
+    def run_headless(self, frames, render=False):
+        """Run the game for a number of timesteps, without waiting between
+        them. The screen is drawn (to the dummy display) only if render."""
+        for _ in range(frames):
+            self.profiler.start_frame()
+            self.step()
+            if render:
+                self._update_screen()
+            self.profiler.end_frame()
+            self._prefetch_next_level()
+
+    def step(self):
+        """Advance the game by one fixed timestep."""
+        with self.profiler.stage('events'):
             self._check_events()
-            if self.stats.game_active:
+            self.controller.update()
+        self._update_state()
+        # Whether everything moved by one step, and can be interpolated.
+        self.moved = self.stats.playing
+        if self.stats.playing:
+            with self.profiler.stage('events.timers'):
+                self.events.advance(self.settings.time_step)
+            with self.profiler.stage('update.ship'):
                 self.ship.update()
-                self._update_bullets()
-                self._update_enemies()
-                self._update_powerups()
+            self._update_bullets()
+            self._update_enemies()
+            self._update_powerups()
+        self.sim_time += self.settings.time_step
+        self.frame += 1
+        self.sound.update(self.sim_time)
+
+    def _update_state(self):
+        """End a timed state (a pause) once its time is up."""
+        stats = self.stats
+        if stats.state_ends_at is None or self.sim_time < stats.state_ends_at:
+            return
+        if stats.state == RESPAWNING:
+            stats.set_state(PLAYING)
+        elif stats.state == LEVEL_TRANSITION:
+            self._start_new_level()
+
+    def use_autopilot(self, restart=True):
+        """Let the autopilot fly the ship instead of the keyboard; with
+        restart, it starts a new game whenever one is over."""
+        self.controller = Autopilot(self, restart)
 
-            self._update_screen()
+    def start_recording(self, filename):
+        """Record the session to filename, from the first frame on."""
+        self.recorder = Recorder(
+            filename, self.seed, started=self.stats.game_active,
+            autopilot=isinstance(self.controller, Autopilot))
+
+    def stop_recording(self):
+        if self.recorder:
+            self.recorder.close(self.frame)
+            self.recorder = None
+
+    def start_replay(self, replay):
+        """Play replay back instead of the live input.
+
+        The game must have been created with the seed of the replay, and
+        not have run any frame yet.
+        """
+        self.replay = replay
+        if replay.autopilot:
+            self.use_autopilot()
+        if replay.started:
+            self._start_game()
 
     def _start_game(self):
+        self._check_loading(wait=True)
         # Reset the game statistics.
         self.settings.initialize_dynamic_settings()
         self.stats.reset_stats()
-        self.stats.game_active = True
+        self.stats.set_state(PLAYING)
         self.sb.prep_images()
+        self.events.start()
         self._setup_level()
         # Remove old powerups only with new game
         self.powerups.empty()
@@ -76,6 +228,14 @@ class AlienInvasion:
         # Hide the mouse cursor.
         pygame.mouse.set_visible(False)
 
+    def _end_level(self):
+        """Move on to the next level, after a pause if there's one."""
+        pause = self.settings.level_transition_time
+        if pause:
+            self.stats.set_state(LEVEL_TRANSITION, self.sim_time + pause)
+        else:
+            self._start_new_level()
+
     def _start_new_level(self):
         """Setup the new level."""
         # Increase level.
@@ -84,50 +244,79 @@ class AlienInvasion:
             self._setup_level()
             # self.settings.increase_speed()
             self.sb.prep_level()
-            self.sound.play_levelup_sound()
+            self.sound.play('levelup')
+            self.stats.set_state(PLAYING)
         else:
-            self.stats.win_game = True
-            self.stats.game_active = False
+            self.stats.set_state(WON)
             # Play win sound TODO
 
     def _setup_level(self):
+        # Everything is put back in place, not moved.
+        self.moved = False
         # Get rid of any remaining enemies, bullets.
         self.enemies.empty()
-        self.ship_bullets.empty()
-        self.enemies_bullets.empty()
+        self.bullets.empty()
 
         # Create a new fleet and center the ship.
         self._create_fleet()
+        self.events.start_enemy_fire(self.enemies)
         self.ship.center_ship()
 
     def _create_fleet(self):
         """Create the fleet of enemies."""
-        # Create an enemy according the the level map.
-        # Spacing between each enemy is equal to half an enemy width.
-        level_data = load_level_data(self.stats.level)
+        level = self.stats.level
+        next_fleet = self.next_fleet
+        if next_fleet and next_fleet[0] == level:
+            # Swap in the fleet built while the last level was played.
+            self.next_fleet = None
+            self.enemies.take(next_fleet[1].result())
+        else:
+            self.enemies.populate(load_level_data(level))
 
-        # Create the full fleet of enemies
-        for y_idx, row in enumerate(level_data):
-            for x_idx, level in enumerate(row):
-                if level:
-                    self._create_enemy(x_idx, y_idx, level)
+    def _prefetch_next_level(self):
+        """Start building the next level's fleet in the background,
+        unless it's already being built.
+
+        This is called at the end of a frame, so the worker mostly runs
+        while the game loop waits for the next one, instead of competing
+        for the interpreter with the frame that started the level.
+        """
+        level = self.stats.level + 1
+        if level > self.settings.MAX_LEVEL or not self.ready:
+            return
+        if self.next_fleet and self.next_fleet[0] == level:
+            return
+        self.next_fleet = (level, self.level_loader.submit(
+            self._build_fleet, level))
+
+    def _build_fleet(self, level):
+        """Return a new fleet for level, off the game loop."""
+        fleet = Fleet(self)
+        fleet.populate(load_level_data(level))
+        # Find the edges of the fleet here too.
+        if fleet:
+            fleet.bounding_box()
+        return fleet
 
     def _create_enemy(self, x_idx, y_idx, level):
         """Create an enemy and place it in the right position in the grid."""
-        enemy = Enemy(self, level)
-        enemy_width, enemy_height = enemy.rect.size
-        enemy.x = enemy_width + 1.5 * enemy_width * x_idx
-        enemy.y = self.settings.fleet_y_start + enemy_height * y_idx
-        enemy.rect.y = enemy.y
-        enemy.rect.x = enemy.x
-        self.enemies.add(enemy)
+        self.enemies.add_at(x_idx, y_idx, level)
 
     def _update_powerups(self):
         """Update the powerups location and if they were taken by the player."""
-        self.powerups.update()
-        collisions = pygame.sprite.spritecollide(self.ship, self.powerups,
-                                                 False, pygame.sprite.collide_mask)
-        for powerup in collisions:
+        profiler = self.profiler
+        with profiler.stage('update.powerups'):
+            self.powerups.update()
+        with profiler.stage('collision.powerups'):
+            self._check_powerups_ship_collisions()
+
+        # Remove powerups that are out of the screen.
+        with profiler.stage('culling.powerups'):
+            self.powerups.cull()
+
+    def _check_powerups_ship_collisions(self):
+        """Apply the powerups taken by the player."""
+        for powerup in self._collide_powerups():
             if isinstance(powerup, LifePowerUp):
                 if self.stats.ships_left < self.settings.max_ships:
                     self.stats.ships_left += 1
@@ -138,59 +327,92 @@ class AlienInvasion:
                 self.ship.create_shield()
             self.powerups.remove(powerup)
 
-        # Remove powerups that are out of the screen.
-        for powerup in self.powerups.copy():
-            if powerup.rect.top >= self.settings.screen_height:
-                self.powerups.remove(powerup)
+    def _collide_powerups(self):
+        """Return the powerups whose masks overlap the ship's, in order."""
+        powerups = self.powerups.sprites()
+        counters = self.powerup_counters
+        ship_rect = self.ship.rect
+        # There are only a few powerups, so their rects are checked
+        # directly instead of through a grid.
+        candidates = ship_rect.collidelistall(
+            [powerup.rect for powerup in powerups])
+        counters.brute_pairs += len(powerups)
+        counters.candidates += len(candidates)
+        counters.overlaps += len(candidates)
+        collisions = []
+        for index in candidates:
+            powerup = powerups[index]
+            offset = (powerup.rect.x - ship_rect.x,
+                      powerup.rect.y - ship_rect.y)
+            if self.ship.mask.overlap(powerup.mask, offset):
+                counters.hits += 1
+                collisions.append(powerup)
+        return collisions
+
+    def collision_counters(self):
+        """Return the broadphase counters of every collision grid."""
+        return {
+            'fleet': self.enemies.grid.counters(),
+            'bullets': self.bullets.grid.counters(),
+            'powerups': self.powerup_counters.counters(),
+        }
+
+    def pool_stats(self):
+        """Return the size and reuse of the bullet and powerup pools."""
+        return {
+            'bullets': self.bullets.pool_stats(),
+            'powerups': self.powerups.pool_stats(),
+        }
 
     def _update_bullets(self):
         """Update position of bullets and get rid of old bullets"""
+        profiler = self.profiler
         # Update bullet positions.
-        self.ship_bullets.update()
-        self.enemies_bullets.update()
-
-        # Get rid of enemy bullets that have disappeared.
-        for bullet in self.enemies_bullets.copy():
-            if bullet.rect.top >= self.settings.screen_height:
-                self.enemies_bullets.remove(bullet)
-        self._check_enemy_bullets_ship_collisions()
-        # Get rid of player bullets that have disappeared.
-        for bullet in self.ship_bullets.copy():
-            if bullet.rect.bottom <= 0:
-                self.ship_bullets.remove(bullet)
+        with profiler.stage('update.bullets'):
+            self.bullets.update()
+
+        # Get rid of bullets that have disappeared.
+        with profiler.stage('culling.bullets'):
+            self.bullets.cull()
+        with profiler.stage('collision.enemy_bullets'):
+            self._check_enemy_bullets_ship_collisions()
 
         if self.enemies:
-            self._check_player_bullets_enemy_collisions()
+            with profiler.stage('collision.player_bullets'):
+                self._check_player_bullets_enemy_collisions()
         else:
-            self._start_new_level()
+            with profiler.stage('level.new'):
+                self._end_level()
 
     def _check_enemy_bullets_ship_collisions(self):
         """Check if enemy bullets hit the ship"""
-        bullet_hit = pygame.sprite.spritecollideany(self.ship, self.enemies_bullets,
-                                                    pygame.sprite.collide_mask)
-        if bullet_hit:
+        bullet_hit = self.bullets.collide_any(ENEMY, self.ship)
+        if bullet_hit is not None:
             if self.ship.shield:
                 # Remove Shield
                 self.ship.remove_shield()
                 # Remove the bullet
-                self.enemies_bullets.remove(bullet_hit)
+                self.bullets.remove([bullet_hit])
             else:
                 self._ship_hit()
 
     def _check_player_bullets_enemy_collisions(self):
         """"Check for any bullets that have hit enemies.
            If so, update enemy life, and remove if dead."""
-        collisions = pygame.sprite.groupcollide(
-            self.ship_bullets, self.enemies, False, False, pygame.sprite.collide_mask)
+        collisions = self.bullets.collide(PLAYER, self.enemies)
 
         if collisions:
-            self.sound.play_boom_sound()
-            for bullet, enemies in collisions.items():
+            for bullet_index, enemies in collisions.items():
+                # Every hit explodes; the sound plays once per step.
+                self.sound.play('boom')
                 # Every shot gain points.
                 self.stats.score += self.settings.hit_points * len(enemies)
                 for enemy in enemies:
+                    # Killed by another bullet of this step.
+                    if enemy not in self.enemies:
+                        continue
                     # Enemy has been hit, decreas one life of the enemy
-                    enemy.life -= bullet.power
+                    enemy.life -= int(self.bullets.power[bullet_index])
                     if enemy.life <= 0:
                         # Update score and remove the enemy
                         self.stats.score += self.settings.kill_points * enemy.level
@@ -198,18 +420,15 @@ class AlienInvasion:
                     # Update the image according to the enemy's life
                     else:
                         enemy.update_image()
-                self.ship_bullets.remove(bullet)
+            self.bullets.remove(collisions)
             self.sb.prep_score()
             self.sb.check_high_score()
 
     def _check_enemies_at_bottom(self):
         """Check if any enemies have reached the bottom of the screen."""
-        screen_rect = self.screen.get_rect()
-        for enemy in self.enemies.sprites():
-            if enemy.rect.bottom >= screen_rect.bottom:
-                # Treat this the same as if the ship got hit.
-                self._ship_hit()
-                break
+        if self.enemies.check_bottom():
+            # Treat this the same as if the ship got hit.
+            self._ship_hit()
 
     def _ship_hit(self):
         """Respond to the ship being hit by an enemy 
@@ -217,30 +436,41 @@ class AlienInvasion:
         if self.stats.ships_left > 1:
             self._lose_ship()
             self._setup_level()
-            # Pause.
-            sleep(0.5)
+            # Pause before the next ship, while the loop keeps running.
+            self.stats.set_state(
+                RESPAWNING, self.sim_time + self.settings.respawn_time)
         else:
             self._lose_ship()
-            self.stats.game_active = False
+            self.stats.set_state(GAME_OVER)
 
     def _lose_ship(self):
         """Update Ship when losing a ship"""
         # Decrement ships left.
         self.stats.ships_left -= 1
         self.sb.prep_ships()
-        self.sound.play_ship_hit_sound()
+        self.sound.play('ship_hit')
 
     def _update_enemies(self):
         """
         Check if the fleet is at an edge,
          then update the positions of all enemies in the fleet.
         """
-        self._check_fleet_edges()
-        self.enemies.update()
+        profiler = self.profiler
+        with profiler.stage('update.enemies'):
+            self._check_fleet_edges()
+            self.enemies.update()
 
         # Look for enemy-ship collisions.
-        enemy_collided = pygame.sprite.spritecollideany(self.ship, self.enemies,
-                                          pygame.sprite.collide_mask)
+        with profiler.stage('collision.enemies'):
+            self._check_enemies_ship_collisions()
+
+        # Look for enemies hitting the bottom of the screen.
+        with profiler.stage('collision.bottom'):
+            self._check_enemies_at_bottom()
+
+    def _check_enemies_ship_collisions(self):
+        """Check if an enemy crashed into the ship."""
+        enemy_collided = self.enemies.collide_any(self.ship)
         if enemy_collided:
             if self.ship.shield:
                 # Remove shield
@@ -250,37 +480,57 @@ class AlienInvasion:
             else:
                 self._ship_hit()
 
-        # Look for enemies hitting the bottom of the screen.
-        self._check_enemies_at_bottom()
-
-    def _update_screen(self):
-        """Update images on the screen, and flip to the new screen"""
-        self.screen.blit(self.settings.bg, (0, 0))
-        self.ship.blitme()
-        for bullet in self.ship_bullets.sprites():
-            bullet.draw_bullet()
-        for bullet in self.enemies_bullets.sprites():
-            bullet.draw_bullet()
-        self.powerups.draw(self.screen)
-        self.enemies.draw(self.screen)
-
-        # Draw the score information.
-        self.sb.show_score()
-
-        # Draw the play button if the game is inactive.
-        if not self.stats.game_active:
-            pygame.mouse.set_visible(True)
-            self.play_button.draw_button()
-            # Draw winning if won the game
-            if self.stats.win_game:
-                self.sb.show_winning_text()
-
-        pygame.display.flip()
+    def _update_screen(self, alpha=1):
+        """Update images on the screen, and show them on the display.
+        alpha is how far the frame is between the last two steps."""
+        self._check_loading()
+        self.renderer.draw(alpha if self.moved else 1)
+        self.startup_times.setdefault('first_frame', perf_counter())
+
+    def _check_loading(self, wait=False):
+        """Take in the images and sounds loaded in the background once
+        they're all done, or wait for them if wait; the game can only
+        start after that."""
+        if self.ready:
+            return
+        if not wait and not (assets.decoded() and self.sound.ready()):
+            return
+        assets.preload(sprite_image_paths())
+        # Built here, before _prefetch_next_level can build fleets on
+        # the worker thread, so it never builds them lazily itself.
+        Enemy.load_states()
+        level_pack()
+        self.settings.load_bg()
+        self.sound.wait()
+        if self.asset_loader:
+            self.asset_loader.shutdown()
+            # The background changed.
+            self.renderer.invalidate()
+        # The first level's fleet, shown behind the Play button.
+        self._create_fleet()
+        self.ready = True
+        self.startup_times['playable'] = perf_counter()
+
+    def _toggle_profiling(self):
+        """Turn the frame profiler and its overlay on or off."""
+        if self.profiler.enabled:
+            self.profiler = NullProfiler()
+            self.profiler_overlay = None
+        else:
+            self.profiler = Profiler(self.settings.profile_history)
+            self.profiler_overlay = ProfilerOverlay(self)
+            self.profiler.start_frame()
+
+    def _write_frame_trace(self):
+        """Write the profiled frames to the trace file."""
+        if self.profiler.enabled:
+            self.profiler.write_trace(self.settings.trace_file)
 
     def _save_high_score_and_exit(self):
         filename = self.settings.highscore_file
         with open(filename, 'w') as file_object:
             file_object.write(str(self.stats.high_score))
+        self.stop_recording()
         pygame.quit()
         sys.exit()
 
@@ -293,78 +543,137 @@ class AlienInvasion:
 
     def _check_events(self):
         """Respond to keypresses and mouse events"""
-        game_active = self.stats.game_active
-        for event in pygame.event.get():
-            if event.type == pygame.QUIT:
-                self._save_high_score_and_exit()
-            elif event.type == pygame.KEYDOWN:
-                self._check_keydown_events(event)
-            elif event.type == pygame.KEYUP:
-                self._check_keyup_events(event)
-            elif event.type == pygame.MOUSEBUTTONDOWN:
-                mouse_pos = pygame.mouse.get_pos()
-                self._check_play_button(mouse_pos)
-            elif event.type == self.events.enemy_shooting.id and game_active:
-                self._enemy_shoots()
-            elif event.type == self.events.powerup_drop.id and game_active:
-                power = random.choice([LifePowerUp, ShieldPowerUp, WeaponPowerUp])
-                self.powerups.add(power(self))
+        for event in self._get_events():
+            self._handle_event(event)
+
+    def _get_events(self):
+        """Return the events of this frame, recording them, or the
+        recorded ones when replaying."""
+        events = pygame.event.get()
+        if self.replay:
+            # Only closing the window and the profiling keys are live.
+            live = [event for event in events if event.type == pygame.QUIT
+                    or (event.type in (pygame.KEYDOWN, pygame.KEYUP)
+                        and event.key in UI_KEYS)]
+            return live + self.replay.events(self.frame)
+        if self.recorder:
+            self.recorder.record(self.frame, events)
+        return events
+
+    def _handle_event(self, event):
+        """Respond to one event."""
+        if event.type == pygame.QUIT:
+            self._save_high_score_and_exit()
+        elif event.type == pygame.KEYDOWN:
+            self._check_keydown_events(event)
+        elif event.type == pygame.KEYUP:
+            self._check_keyup_events(event)
+        elif event.type == pygame.MOUSEBUTTONDOWN:
+            self._check_play_button(event.pos)
+
+    def _drop_powerup(self):
+        power = self.random.choice([LifePowerUp, ShieldPowerUp, WeaponPowerUp])
+        self.powerups.drop(power)
 
     def _enemy_shoots(self):
         if self.enemies:
-            selected_alien = random.choice(self.enemies.sprites())
-            new_bullet = EnemyBullet(self, selected_alien)
-            self.enemies_bullets.add(new_bullet)
+            selected_alien = self.random.choice(self.enemies.sprites())
+            self.bullets.fire_enemy_bullet(selected_alien)
 
     def _check_keyup_events(self, event):
-        if event.key == pygame.K_RIGHT:
-            self.ship.moving_right = False
-        elif event.key == pygame.K_LEFT:
-            self.ship.moving_left = False
-        elif event.key == pygame.K_UP:
-            self.ship.moving_up = False
-        elif event.key == pygame.K_DOWN:
-            self.ship.moving_down = False
+        self.controller.key_up(event.key)
 
     def _check_keydown_events(self, event):
-        if event.key == pygame.K_RIGHT:
-            self.ship.moving_right = True
-        elif event.key == pygame.K_LEFT:
-            self.ship.moving_left = True
-        elif event.key == pygame.K_UP:
-            self.ship.moving_up = True
-        elif event.key == pygame.K_DOWN:
-            self.ship.moving_down = True
-        elif event.key == pygame.K_q:
+        """Respond to the game's own keys, and pass the others (moving
+        and firing) to the controller."""
+        if event.key == pygame.K_q:
             self._save_high_score_and_exit()
-        elif event.key == pygame.K_SPACE:
-            self._fire_bullet()
         elif event.key == pygame.K_p and not self.stats.game_active:
             self._start_game()
+        elif event.key == pygame.K_F3:
+            self._toggle_profiling()
+        elif event.key == pygame.K_F4:
+            self._write_frame_trace()
+        else:
+            self.controller.key_down(event.key)
 
     def _fire_bullet(self):
-        """Create a new bullet and add it to the bullets group."""
-        bullets_available = len(
-            self.ship_bullets) < self.settings.bullets_allowed
-        if bullets_available and self.stats.game_active:
-            new_bullet = PlayerBullet(self)
-            self.ship_bullets.add(new_bullet)
+        """Fire a new bullet from the ship, if the player may."""
+        bullets_available = self.bullets.count_owner(
+            PLAYER) < self.settings.bullets_allowed
+        if bullets_available and self.stats.playing:
+            self.bullets.fire_player_bullet(self.ship, self.stats.weapon_power)
 
     def _check_fleet_edges(self):
         """Respond appropriately if any enemies have reached an edge."""
-        for enemy in self.enemies.sprites():
-            if enemy.check_edges():
-                self._change_fleet_direction()
-                break
+        if self.enemies.check_edges():
+            self._change_fleet_direction()
 
     def _change_fleet_direction(self):
         """Drop the entire fleet and change the fleet's direction."""
-        for enemy in self.enemies.sprites():
-            enemy.drop_verticaly()
+        self.enemies.drop()
         self.settings.fleet_direction *= -1
 
 
+def parse_args():
+    parser = argparse.ArgumentParser(description='Play Alien Invasion.')
+    parser.add_argument('--headless', type=int, metavar='FRAMES',
+                        help='start a game without a window or audio, and '
+                             'simulate it for FRAMES timesteps')
+    parser.add_argument('--render', action='store_true',
+                        help='draw every headless frame to a dummy display')
+    parser.add_argument('--renderer', choices=['dirty', 'full'],
+                        help="redraw only what changed, or the full screen, "
+                             "every frame (default: dirty)")
+    parser.add_argument('--seed', type=int,
+                        help='seed everything random in the game')
+    recording = parser.add_mutually_exclusive_group()
+    recording.add_argument('--record', metavar='FILE',
+                           help='record the session to FILE')
+    recording.add_argument('--replay', metavar='FILE',
+                           help='play back the session recorded in FILE')
+    parser.add_argument('--fast', action='store_true',
+                        help='with --replay, replay as fast as possible '
+                             'without a window')
+    parser.add_argument('--autopilot', action='store_true',
+                        help='let the autopilot play, starting a new game '
+                             'whenever one is over')
+    return parser.parse_args()
+
+
+def print_summary(ai):
+    print(f"Simulated {ai.sim_time / 1000:.1f}s: level {ai.stats.level}, "
+          f"score {ai.stats.score}, ships left {ai.stats.ships_left}")
+
+
 if __name__ == '__main__':
-    # Make a game instance, and run the game.
-    ai = AlienInvasion()
-    ai.run_game()
+    args = parse_args()
+    if args.replay:
+        replay = Replay.load(args.replay)
+        ai = AlienInvasion(headless=args.fast, render_mode=args.renderer,
+                           seed=replay.seed)
+        ai.start_replay(replay)
+        if args.fast:
+            ai.run_headless(replay.frames)
+        else:
+            ai.run_game()
+        print_summary(ai)
+    elif args.headless is None:
+        # Make a game instance, and run the game.
+        ai = AlienInvasion(render_mode=args.renderer, seed=args.seed)
+        if args.autopilot:
+            ai.use_autopilot()
+        if args.record:
+            ai.start_recording(args.record)
+        ai.run_game()
+    else:
+        ai = AlienInvasion(headless=True, render_mode=args.renderer,
+                           seed=args.seed)
+        if args.autopilot:
+            ai.use_autopilot()
+        ai._start_game()
+        if args.record:
+            ai.start_recording(args.record)
+        ai.run_headless(args.headless, render=args.render)
+        ai.stop_recording()
+        print_summary(ai)
@@ -0,0 +1,237 @@
+"""The baked image cache: every image of the game, ready to draw.
+
+Decoding the PNGs and the JPEG and converting them to the display format
+is the bulk of the game's startup. The bake does it once, and writes the
+pixels, already in the display format, and the collision masks to one
+file. At startup the file is memory-mapped: the images with per-pixel
+alpha are drawn straight from it (pygame.image.frombuffer), the opaque
+ones are copied into a display surface, and the masks are drawn from
+their runs of set pixels, row by row. Nothing is decoded.
+
+The cache is rebuilt when an image is added, removed or changed (its
+SHA-1 differs) or when the display uses another pixel format:
+    python asset_cache.py bake
+"""
+import argparse
+import hashlib
+import mmap
+import os
+import struct
+
+import numpy as np
+import pygame
+
+from assets import assets, mask_bits, sprite_image_paths
+from files import atomic_write
+from settings import bg_image_path
+
+CACHE_PATH = os.path.join('images', 'assets.cache')
+
+# The cache starts with a header (magic, version, bits per pixel and
+# masks of the display format, number of images), followed by an entry
+# for every image: the length of its path and the path, then the SHA-1
+# of the file, whether it has per-pixel alpha, its size, pitch and
+# masks, and the offset of its pixels and of its mask's runs, the number
+# of runs. The runs are (row, start, length) triples of uint16.
+CACHE_MAGIC = b'AIMG'
+CACHE_VERSION = 1
+_HEADER = struct.Struct('<4sHB4IH')
+_PATH_LENGTH = struct.Struct('<H')
+_ENTRY = struct.Struct('<20sBHHH4IIII')
+
+# The masks of the pixels pygame.image.frombuffer makes for 'BGRA'.
+_BGRA_MASKS = (0xff0000, 0xff00, 0xff, 0xff000000)
+
+
+def baked_images():
+    """Return (path, alpha) for every image in the cache."""
+    return ([(path, True) for path in sprite_image_paths()]
+            + [(bg_image_path(), False)])
+
+
+def file_hash(path):
+    with open(path, 'rb') as file_object:
+        return hashlib.sha1(file_object.read()).digest()
+
+
+def display_format():
+    """Return (bits per pixel, masks) of the display."""
+    screen = pygame.display.get_surface()
+    return screen.get_bitsize(), tuple(screen.get_masks())
+
+
+def mask_runs(mask):
+    """Return the runs of set pixels of mask, as an array of (row,
+    start, length)."""
+    width, height = mask.get_size()
+    bits = np.zeros((height, width + 2), dtype=np.int8)
+    bits[:, 1:-1] = mask_bits(mask)
+    edges = np.diff(bits, axis=1)
+    rows, starts = np.nonzero(edges == 1)
+    _, ends = np.nonzero(edges == -1)
+    return np.stack([rows, starts, ends - starts], axis=1).astype(np.uint16)
+
+
+def mask_from_runs(size, runs):
+    """Return a mask of size with the runs of set pixels."""
+    mask = pygame.mask.Mask(size)
+    run_masks = {}
+    for row, start, length in runs.tolist():
+        run_mask = run_masks.get(length)
+        if run_mask is None:
+            run_mask = run_masks[length] = pygame.mask.Mask((length, 1),
+                                                            fill=True)
+        mask.draw(run_mask, (start, row))
+    return mask
+
+
+def bake(cache_path=CACHE_PATH):
+    """Convert every image to the display format and write the cache.
+
+    The display mode must be set.
+    """
+    bitsize, masks = display_format()
+    entries = []
+    data = bytearray()
+    images = baked_images()
+    for path, alpha in images:
+        image = pygame.image.load(path)
+        image = image.convert_alpha() if alpha else image.convert()
+        runs = mask_runs(pygame.mask.from_surface(image)) if alpha else None
+        pixels_offset = len(data)
+        data.extend(image.get_buffer().raw)
+        runs_offset = len(data)
+        if runs is not None:
+            data.extend(runs.tobytes())
+        entries.append((path, _ENTRY.pack(
+            file_hash(path), alpha, image.get_width(), image.get_height(),
+            image.get_pitch(), *image.get_masks(), pixels_offset, runs_offset,
+            len(runs) if runs is not None else 0)))
+
+    index = bytearray(_HEADER.pack(CACHE_MAGIC, CACHE_VERSION, bitsize,
+                                   *masks, len(entries)))
+    for path, entry in entries:
+        name = path.encode()
+        index += _PATH_LENGTH.pack(len(name)) + name + entry
+    # The pixels start on a 16-byte boundary.
+    data_start = -(-len(index) // 16) * 16
+    # Other processes may be baking too.
+    atomic_write(cache_path, index.ljust(data_start, b'\0') + data)
+    return len(entries)
+
+
+class AssetCache:
+    """A baked image cache, memory-mapped.
+
+    Raises ValueError if the cache is missing parts, isn't of this
+    version, or is stale.
+    """
+
+    def __init__(self, cache_path=CACHE_PATH):
+        with open(cache_path, 'rb') as cache_file:
+            self.data = mmap.mmap(cache_file.fileno(), 0,
+                                  access=mmap.ACCESS_READ)
+        try:
+            self._read_index(cache_path)
+        except (ValueError, struct.error):
+            self.data.close()
+            raise
+
+    def _read_index(self, cache_path):
+        header = _HEADER.unpack_from(self.data)
+        magic, version, bitsize = header[:3]
+        masks, count = header[3:7], header[7]
+        if magic != CACHE_MAGIC or version != CACHE_VERSION:
+            raise ValueError(f"{cache_path} isn't an image cache "
+                             f"of version {CACHE_VERSION}")
+        if (bitsize, masks) != display_format():
+            raise ValueError(f"{cache_path} is for another display format")
+
+        # The entry of every image, by (path, alpha).
+        self.entries = {}
+        offset = _HEADER.size
+        for _ in range(count):
+            length, = _PATH_LENGTH.unpack_from(self.data, offset)
+            offset += _PATH_LENGTH.size
+            path = self.data[offset:offset + length].decode()
+            offset += length
+            entry = _ENTRY.unpack_from(self.data, offset)
+            offset += _ENTRY.size
+            self.entries[(path, bool(entry[1]))] = entry
+        self.data_start = -(-offset // 16) * 16
+
+        if sorted(self.entries) != sorted(baked_images()):
+            raise ValueError(f"{cache_path} doesn't have the same images")
+        for (path, _), entry in self.entries.items():
+            if entry[0] != file_hash(path):
+                raise ValueError(f"{path} changed since {cache_path} was "
+                                 f"baked")
+
+    def __contains__(self, key):
+        return key in self.entries
+
+    def image(self, path, alpha):
+        """Return the surface of the image at path, in the display
+        format."""
+        (_, _, width, height, pitch, *masks, pixels_offset, _,
+         _) = self.entries[(path, alpha)]
+        start = self.data_start + pixels_offset
+        if alpha and tuple(masks) == _BGRA_MASKS and pitch == width * 4:
+            # Drawn from the cache itself.
+            pixels = memoryview(self.data)[start:start + pitch * height]
+            return pygame.image.frombuffer(pixels, (width, height), 'BGRA')
+        flags = pygame.SRCALPHA if alpha else 0
+        image = pygame.Surface((width, height), flags,
+                               pygame.display.get_surface().get_bitsize(),
+                               masks)
+        view = image.get_view('1')
+        np.frombuffer(view, dtype=np.uint8)[:] = np.frombuffer(
+            self.data, dtype=np.uint8, count=pitch * height, offset=start)
+        del view
+        return image
+
+    def mask(self, path):
+        """Return the collision mask of the image at path, or None if it
+        has none."""
+        entry = self.entries.get((path, True))
+        if entry is None:
+            return None
+        width, height = entry[2:4]
+        runs_offset, run_count = entry[-2:]
+        start = self.data_start + runs_offset
+        runs = np.frombuffer(self.data, dtype=np.uint16, count=run_count * 3,
+                             offset=start).reshape(-1, 3)
+        return mask_from_runs((width, height), runs)
+
+
+def use_asset_cache(cache_path=CACHE_PATH):
+    """Load the images from the cache from now on, baking it first if
+    it's missing or stale. The display mode must be set. Return the
+    cache, or None if it can't be written or read (the images are then
+    decoded as before)."""
+    try:
+        cache = AssetCache(cache_path)
+    except (OSError, ValueError, struct.error):
+        try:
+            bake(cache_path)
+            cache = AssetCache(cache_path)
+        except (OSError, ValueError, struct.error):
+            return None
+    assets.use_cache(cache)
+    return cache
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Manage the image cache.")
+    parser.add_argument('command', choices=['bake'],
+                        help='bake: convert the images to the display format '
+                             f'and write them to {CACHE_PATH}')
+    parser.parse_args()
+    pygame.display.init()
+    pygame.display.set_mode((1, 1), pygame.HIDDEN)
+    count = bake()
+    print(f"Baked {count} images to {CACHE_PATH}")
+
+
+if __name__ == "__main__":
+    main()
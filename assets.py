@@ -0,0 +1,141 @@
+import os.path
+
+import pygame
+
+from broadphase import occupancy
+
+
+class Assets:
+    """A process-wide registry of loaded images and their masks.
+
+    Every image is loaded from disk and converted to the display format
+    only once, the first time it is requested. Later requests get the
+    same shared surface back, so sprites must never draw onto it.
+
+    Images can be decoded ahead of time on a thread pool; converting
+    them needs the display, so it's left to the first request, on the
+    main thread. Images in the baked cache (see asset_cache.py) aren't
+    decoded at all.
+    """
+
+    def __init__(self):
+        self.images = {}
+        self.masks = {}
+        self.occupancies = {}
+        # The images being decoded in the background, by path.
+        self.pending = {}
+        self.cache = None
+        self.hits = 0
+        self.misses = 0
+
+    def image(self, path, alpha=True):
+        """Return the shared surface for the image at path."""
+        key = (path, alpha)
+        image = self.images.get(key)
+        if image is None:
+            self.misses += 1
+            if self.cache and key in self.cache:
+                image = self.cache.image(path, alpha)
+            else:
+                image = self._load(path, alpha)
+            self.images[key] = image
+        else:
+            self.hits += 1
+        return image
+
+    def _load(self, path, alpha):
+        """Decode the image at path, and convert it to the display
+        format."""
+        pending = self.pending.pop(path, None)
+        if pending:
+            image = pending.result()
+        else:
+            image = pygame.image.load(path)
+        return image.convert_alpha() if alpha else image.convert()
+
+    def mask(self, path):
+        """Return the shared collision mask for the image at path."""
+        mask = self.masks.get(path)
+        if mask is None:
+            if self.cache:
+                mask = self.cache.mask(path)
+            if mask is None:
+                mask = pygame.mask.from_surface(self.image(path))
+            self.masks[path] = mask
+        return mask
+
+    def occupancy(self, path):
+        """Return the shared summed-area table of the mask of the image
+        at path (see broadphase.occupancy)."""
+        table = self.occupancies.get(path)
+        if table is None:
+            table = occupancy([mask_bits(self.mask(path))])[0]
+            self.occupancies[path] = table
+        return table
+
+    def image_and_mask(self, path):
+        """Return the shared surface and mask for the image at path."""
+        return self.image(path), self.mask(path)
+
+    def preload(self, paths):
+        """Load the images and masks of paths ahead of time."""
+        for path in paths:
+            self.mask(path)
+
+    def use_cache(self, cache):
+        """Take the images in cache from it from now on."""
+        self.cache = cache
+
+    def load_in_background(self, paths, executor):
+        """Start decoding the images of paths that aren't loaded or
+        cached yet on executor."""
+        loaded = {path for path, _ in self.images}
+        if self.cache:
+            loaded.update(path for path, _ in self.cache.entries)
+        for path in paths:
+            if path not in loaded and path not in self.pending:
+                self.pending[path] = executor.submit(pygame.image.load, path)
+
+    def decoded(self):
+        """Return True if no image is still being decoded."""
+        return all(future.done() for future in self.pending.values())
+
+    def stats(self):
+        """Return the cache counters as a dict."""
+        return {
+            'images': len(self.images),
+            'masks': len(self.masks),
+            'hits': self.hits,
+            'misses': self.misses,
+        }
+
+    def clear(self):
+        """Forget every cached image, e.g. after the display mode changed."""
+        self.images.clear()
+        self.masks.clear()
+        self.occupancies.clear()
+        self.pending.clear()
+        self.hits = 0
+        self.misses = 0
+
+
+def mask_bits(mask):
+    """Return the bits of mask as a boolean array, by row."""
+    surface = mask.to_surface(setcolor=(255, 255, 255, 255),
+                              unsetcolor=(0, 0, 0, 255))
+    return (pygame.surfarray.array2d(surface).T & 1).astype(bool)
+
+
+def image_path(filename):
+    """Return the path of an image in the images folder."""
+    return os.path.join('images', filename)
+
+
+def sprite_image_paths():
+    """Return the paths of all the sprite images of the game."""
+    return [image_path(filename) for filename in sorted(os.listdir('images'))
+            if filename.endswith('.png')]
+
+
+# The shared registry used by all the sprites of the game.
+assets = Assets()
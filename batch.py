@@ -0,0 +1,234 @@
+"""Simulate many seeded headless games in parallel, to balance the levels.
+
+Every game is played by a policy (random key presses, or sweeping from
+side to side while firing) for up to a number of frames, or until it's
+lost or won. Games run in a pool of processes, one line of JSON per game
+is written to the output as soon as it finishes, and the stats of every
+level are summed up at the end: how often and how fast it's cleared,
+the ships lost on it, the shots per kill and the score.
+
+Settings and level folders can be swept; every combination is played
+with the same seeds:
+    python batch.py --games 16 --frames 36000 --policy sweep \\
+        --set enemy_speed=2,2.5,3 --set bullet_gen_time=1500,2000 \\
+        --levels levels my_levels --output results.jsonl
+"""
+import argparse
+import ast
+import itertools
+import json
+import os
+import random
+import subprocess
+import sys
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from time import perf_counter
+
+import asset_cache
+from alien_invasion import AlienInvasion
+from bullet import PLAYER
+from events import Events
+from levels import LEVELS_DIR, use_levels
+from settings import Settings
+
+
+class RandomPolicy:
+    """Move in random directions and fire at random."""
+
+    def __init__(self, seed):
+        self.random = random.Random(seed)
+
+    def act(self, game, frame):
+        ship = game.ship
+        if self.random.random() < 0.05:
+            direction = self.random.choice(['left', 'right', None])
+            ship.moving_left = direction == 'left'
+            ship.moving_right = direction == 'right'
+        return self.random.random() < 0.2
+
+
+class SweepPolicy:
+    """Sweep the ship from side to side, firing whenever it can."""
+
+    def __init__(self, seed):
+        pass
+
+    def act(self, game, frame):
+        sweep_left = (frame // 90) % 2 == 1
+        game.ship.moving_left = sweep_left
+        game.ship.moving_right = not sweep_left
+        return True
+
+
+POLICIES = {'random': RandomPolicy, 'sweep': SweepPolicy}
+
+
+def _new_level(level):
+    return {'level': level, 'frames': 0, 'ships_lost': 0, 'shots': 0,
+            'kills': 0, 'score': 0, 'cleared': False}
+
+
+def play(job):
+    """Play one game, and return its result as a dict."""
+    use_levels(job['levels_dir'])
+    game = AlienInvasion(headless=True, seed=job['seed'])
+    game._start_game()
+    for name, value in job['settings'].items():
+        setattr(game.settings, name, value)
+    # The timers were set from the settings when the game started.
+    game.events = Events(game)
+    game.events.start_enemy_fire(game.enemies)
+    policy = POLICIES[job['policy']](job['seed'])
+    stats = game.stats
+
+    levels = [_new_level(stats.level)]
+    frame = 0
+    while frame < job['frames'] and stats.game_active:
+        current = levels[-1]
+        level, ships_left = stats.level, stats.ships_left
+        enemies, score = len(game.enemies), stats.score
+
+        if policy.act(game, frame):
+            shots = game.bullets.count_owner(PLAYER)
+            game._fire_bullet()
+            current['shots'] += game.bullets.count_owner(PLAYER) - shots
+        game.step()
+        frame += 1
+
+        current['frames'] += 1
+        current['score'] += stats.score - score
+        if stats.ships_left < ships_left:
+            current['ships_lost'] += ships_left - stats.ships_left
+        elif stats.level != level:
+            # The last enemies were shot, and the next fleet came in.
+            current['kills'] += enemies
+        else:
+            current['kills'] += max(0, enemies - len(game.enemies))
+        if stats.level != level or stats.win_game:
+            current['cleared'] = True
+            if stats.game_active:
+                levels.append(_new_level(stats.level))
+
+    return dict(job, played_frames=frame, level_reached=stats.level,
+                score=stats.score, won=stats.win_game,
+                lost=not stats.game_active and not stats.win_game,
+                levels=levels)
+
+
+def aggregate(results):
+    """Return the stats of every level for every combination of settings
+    and levels, as {(settings, levels): {level: stats}}."""
+    totals = {}
+    for result in results:
+        key = (json.dumps(result['settings'], sort_keys=True),
+               result['levels_dir'])
+        per_level = totals.setdefault(key, {})
+        for level in result['levels']:
+            total = per_level.setdefault(level['level'], {
+                'attempts': 0, 'cleared': 0, 'clear_frames': 0,
+                'ships_lost': 0, 'shots': 0, 'kills': 0, 'score': 0})
+            total['attempts'] += 1
+            total['ships_lost'] += level['ships_lost']
+            total['shots'] += level['shots']
+            total['kills'] += level['kills']
+            total['score'] += level['score']
+            if level['cleared']:
+                total['cleared'] += 1
+                total['clear_frames'] += level['frames']
+    return totals
+
+
+def print_summary(totals, fps):
+    for (settings, levels_dir), per_level in totals.items():
+        print(f"settings {settings}, levels {levels_dir}")
+        print(f"  {'level':>5}{'games':>7}{'cleared':>9}{'clear s':>9}"
+              f"{'ships lost':>12}{'shots/kill':>12}{'score':>9}")
+        for level, total in sorted(per_level.items()):
+            attempts = total['attempts']
+            cleared = total['cleared']
+            clear_time = (total['clear_frames'] / cleared / fps
+                          if cleared else float('nan'))
+            shots_per_kill = (total['shots'] / total['kills']
+                              if total['kills'] else float('nan'))
+            print(f"  {level:>5}{attempts:>7}{cleared / attempts:>9.0%}"
+                  f"{clear_time:>9.1f}"
+                  f"{total['ships_lost'] / attempts:>12.2f}"
+                  f"{shots_per_kill:>12.2f}"
+                  f"{total['score'] / attempts:>9.0f}")
+
+
+def parse_setting(text, settings):
+    """Parse NAME=VALUE,VALUE,... into (NAME, [values])."""
+    name, _, values = text.partition('=')
+    if not hasattr(settings, name) or not values:
+        raise argparse.ArgumentTypeError(f"not a setting to sweep: {text}")
+    return name, [ast.literal_eval(value) for value in values.split(',')]
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--games', type=int, default=8,
+                        help='games (seeds) per combination (default: 8)')
+    parser.add_argument('--frames', type=int, default=36000,
+                        help='most frames per game (default: 36000, 10 '
+                             'minutes of play)')
+    parser.add_argument('--policy', choices=POLICIES, default='sweep')
+    parser.add_argument('--set', action='append', default=[],
+                        metavar='NAME=VALUES',
+                        help='sweep a setting over comma-separated values')
+    parser.add_argument('--levels', nargs='+', default=[LEVELS_DIR],
+                        metavar='DIR', help='sweep folders of level files')
+    parser.add_argument('--workers', type=int,
+                        help='processes to use (default: one per core)')
+    parser.add_argument('--output', default='batch_results.jsonl',
+                        help='the file the games are written to')
+    args = parser.parse_args()
+    settings = Settings()
+    try:
+        args.set = [parse_setting(text, settings) for text in args.set]
+    except (argparse.ArgumentTypeError, ValueError, SyntaxError) as error:
+        parser.error(str(error))
+    return args
+
+
+def main():
+    args = parse_args()
+    names = [name for name, _ in args.set]
+    grid = [dict(zip(names, values)) for values
+            in itertools.product(*(values for _, values in args.set))]
+    # Check and compile every level folder once, before the workers.
+    for levels_dir in args.levels:
+        use_levels(levels_dir)
+    # Bake the image cache once too, for the dummy display of the
+    # workers, instead of in all of them at once.
+    if Settings().use_asset_cache:
+        subprocess.run([sys.executable, asset_cache.__file__, 'bake'],
+                       env=dict(os.environ, SDL_VIDEODRIVER='dummy'),
+                       capture_output=True)
+    jobs = [{'settings': settings, 'levels_dir': levels_dir, 'seed': seed,
+             'policy': args.policy, 'frames': args.frames}
+            for settings in grid for levels_dir in args.levels
+            for seed in range(args.games)]
+
+    results = []
+    frames = 0
+    start = perf_counter()
+    with ProcessPoolExecutor(args.workers) as executor, \
+            open(args.output, 'w') as output:
+        futures = [executor.submit(play, job) for job in jobs]
+        for done, future in enumerate(as_completed(futures), 1):
+            result = future.result()
+            output.write(json.dumps(result) + '\n')
+            output.flush()
+            results.append(result)
+            frames += result['played_frames']
+            print(f"\r{done}/{len(jobs)} games", end='', file=sys.stderr)
+    elapsed = perf_counter() - start
+    print(f"\r{len(jobs)} games, {frames} frames in {elapsed:.1f}s "
+          f"({frames / elapsed:.0f} frames/s), written to {args.output}",
+          file=sys.stderr)
+    print_summary(aggregate(results), Settings().FPS)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1 @@
+"""Benchmarks for Alien Invasion. Run them from the repository root."""
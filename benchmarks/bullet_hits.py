@@ -0,0 +1,124 @@
+"""Time the bullet hit test against the masks it replaced.
+
+Bullets are placed at random around and over every enemy image and the
+ship images, and tested with the occupancy tables (broadphase.rects_hit)
+and with the overlap of the image's mask. Then a fleet is shot at, with
+Bullets.collide and with the previous per-pair mask test.
+tests/test_bullet_hits.py checks that they find the same hits.
+
+Usage: python -m benchmarks.bullet_hits [number_of_placements]
+"""
+import os
+import random
+import sys
+from time import perf_counter
+
+os.environ.setdefault('SDL_VIDEODRIVER', 'dummy')
+
+import numpy as np
+import pygame
+
+from assets import assets, image_path
+from benchmarks.game_stub import StubGame
+from broadphase import rects_hit
+from bullet import ENEMY, PLAYER, Bullets
+from enemy import Enemy
+from fleet import Fleet
+
+
+def mask_collide(bullets, owner, fleet, bullet_mask):
+    """The previous Bullets.collide, with a mask test for every pair."""
+    collisions = {}
+    indices = np.flatnonzero(bullets.owner[:bullets.count] == owner)
+    enemy_lefts, enemy_tops = fleet.build_grid()
+    lefts, tops, widths, heights = bullets._rects(indices)
+    pairs = fleet.grid.pairs(lefts, tops, widths, heights)
+    for i, e in zip(*(pair.tolist() for pair in pairs)):
+        offset = (int(lefts[i] - enemy_lefts[e]),
+                  int(tops[i] - enemy_tops[e]))
+        if fleet.enemies[e].mask.overlap(bullet_mask, offset):
+            collisions.setdefault(int(indices[i]), []).append(
+                fleet.enemies[e])
+    return collisions
+
+
+def time_placements(tables, masks, bullet_mask, placements, rng):
+    """Time both tests over random placements of a bullet around every
+    mask; return the time of each."""
+    width, height = bullet_mask.get_size()
+    mask_time = table_time = 0
+    for index, mask in enumerate(masks):
+        mask_width, mask_height = mask.get_size()
+        lefts = np.array([rng.randint(-width, mask_width)
+                          for _ in range(placements)])
+        tops = np.array([rng.randint(-height, mask_height)
+                         for _ in range(placements)])
+
+        start = perf_counter()
+        for left, top in zip(lefts.tolist(), tops.tolist()):
+            mask.overlap(bullet_mask, (left, top))
+        mask_time += perf_counter() - start
+        start = perf_counter()
+        rects_hit(tables, np.full(placements, index), lefts, tops, width,
+                  height)
+        table_time += perf_counter() - start
+    return mask_time, table_time
+
+
+def main():
+    placements = int(sys.argv[1]) if len(sys.argv) > 1 else 20000
+    rng = random.Random(1)
+    pygame.init()
+    game = StubGame()
+    bullets = Bullets(game)
+    bullet_mask = pygame.mask.Mask((bullets.width, bullets.height),
+                                   fill=True)
+
+    fleet = Fleet(game)
+    fleet.add(1)
+    enemy_masks = [Enemy.states[(9, life)].mask for life in range(1, 10)]
+    mask_time, table_time = time_placements(
+        Enemy.occupancy, enemy_masks, bullet_mask, placements, rng)
+    for filename in ('ship.png', 'ship_shielded.png'):
+        path = image_path(filename)
+        result = time_placements(
+            assets.occupancy(path)[None], [assets.mask(path)], bullet_mask,
+            placements, rng)
+        mask_time += result[0]
+        table_time += result[1]
+    tests = placements * (len(enemy_masks) + 2)
+    print(f"placements: {tests}")
+    print(f"mask overlap per test: {mask_time / tests * 1e6:8.3f} us")
+    print(f"occupancy per test:    {table_time / tests * 1e6:8.3f} us")
+
+    # A full fleet of every level, shot at from everywhere.
+    fleet = Fleet(game)
+    for y_idx in range(5):
+        for x_idx in range(9):
+            fleet.add_at(x_idx, y_idx, rng.randint(1, 9))
+    rounds = 50
+    mask_time = table_time = 0
+    for _ in range(rounds):
+        bullets.empty()
+        for enemy in fleet:
+            enemy.life = rng.randint(1, enemy.level)
+            enemy.update_image()
+        for _ in range(200):
+            bullets._rect.topleft = (
+                rng.randint(0, game.settings.screen_width),
+                rng.randint(0, game.settings.screen_height // 2))
+            bullets._add(rng.choice((PLAYER, ENEMY)), 0, 1)
+        fleet.build_grid()
+        start = perf_counter()
+        mask_collide(bullets, PLAYER, fleet, bullet_mask)
+        mask_time += perf_counter() - start
+        start = perf_counter()
+        bullets.collide(PLAYER, fleet)
+        table_time += perf_counter() - start
+    print(f"fleet rounds: {rounds}")
+    print(f"mask collide per round:      {mask_time / rounds * 1e6:8.1f} us")
+    print(f"occupancy collide per round: {table_time / rounds * 1e6:8.1f} us")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,49 @@
+"""Micro-benchmark of the per-hit cost of Enemy.update_image.
+
+Usage: python -m benchmarks.enemy_hit [number_of_hits]
+"""
+import os
+import sys
+from timeit import timeit
+
+os.environ.setdefault('SDL_VIDEODRIVER', 'dummy')
+
+import pygame
+
+from benchmarks.game_stub import StubGame
+from enemy import Enemy
+from fleet import Fleet
+
+
+def rebuild_mask_update(enemy):
+    """The previous update_image, which rebuilt the mask on every hit."""
+    image_idx = min(enemy.life, 9) - 1
+    enemy.image = enemy.state_images[image_idx]
+    enemy.mask = pygame.mask.from_surface(enemy.image)
+    rect = enemy.image.get_rect()
+    rect.x = enemy.x
+    rect.y = enemy.y
+
+
+def main():
+    hits = int(sys.argv[1]) if len(sys.argv) > 1 else 100000
+    pygame.init()
+    game = StubGame()
+    enemy = Fleet(game).add(9)
+    enemy.state_images = [Enemy.states[(9, life)].image
+                          for life in range(1, 10)]
+
+    def hit(update):
+        enemy.life = enemy.life - 1 or enemy.level
+        update()
+
+    before = timeit(lambda: hit(lambda: rebuild_mask_update(enemy)),
+                    number=hits)
+    after = timeit(lambda: hit(enemy.update_image), number=hits)
+    print(f"rebuild mask per hit: {before / hits * 1e6:8.2f} us")
+    print(f"state table per hit:  {after / hits * 1e6:8.2f} us")
+    print(f"speedup:              {before / after:8.1f}x")
+
+
+if __name__ == '__main__':
+    main()
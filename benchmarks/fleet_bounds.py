@@ -0,0 +1,67 @@
+"""Micro-benchmark of the fleet's edge and bottom checks.
+
+The fleet of every level is flown as in the game, bouncing off the edges
+of the screen and dropping, and every few steps both checks are timed
+with the tracked bounding box and with the previous scan of every enemy.
+tests/test_fleet_bounds.py checks that they agree.
+
+Usage: python -m benchmarks.fleet_bounds [number_of_checks]
+"""
+import os
+import sys
+from timeit import timeit
+
+os.environ.setdefault('SDL_VIDEODRIVER', 'dummy')
+
+import pygame
+
+from benchmarks.game_stub import StubGame
+from fleet import Fleet
+from levels import load_level_data
+
+
+def scan_checks(fleet):
+    """The previous check_edges and check_bottom, which scanned every
+    enemy."""
+    n = len(fleet)
+    lefts = fleet.lefts()
+    rights = lefts + fleet.width[:n]
+    bottoms = fleet.tops() + fleet.height[:n]
+    return (bool(lefts.min() <= 0 or rights.max() >= fleet.screen_rect.right),
+            bool(bottoms.max() >= fleet.screen_rect.bottom))
+
+
+def tracked_checks(fleet):
+    return fleet.check_edges(), fleet.check_bottom()
+
+
+def main():
+    checks = int(sys.argv[1]) if len(sys.argv) > 1 else 200
+    pygame.init()
+    game = StubGame()
+    settings = game.settings
+    before = after = 0
+    samples = 0
+    for level in range(1, settings.MAX_LEVEL + 1):
+        settings.fleet_direction = 1
+        fleet = Fleet(game)
+        fleet.populate(load_level_data(level))
+        steps = 0
+        while not fleet.check_bottom():
+            if steps % 100 == 0:
+                before += timeit(lambda: scan_checks(fleet), number=checks)
+                after += timeit(lambda: tracked_checks(fleet), number=checks)
+                samples += checks
+            if fleet.check_edges():
+                fleet.drop()
+                settings.fleet_direction *= -1
+            fleet.update()
+            steps += 1
+    print(f"levels: {settings.MAX_LEVEL}, checks timed: {samples}")
+    print(f"scan every enemy:     {before / samples * 1e6:8.2f} us")
+    print(f"tracked bounding box: {after / samples * 1e6:8.2f} us")
+    print(f"speedup:              {before / after:8.1f}x")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,13 @@
+import pygame
+
+from settings import Settings
+
+
+class StubGame:
+    """The few game attributes a Fleet and Bullets need, without the
+    rest of the game."""
+
+    def __init__(self):
+        self.settings = Settings()
+        self.screen = pygame.display.set_mode(
+            (self.settings.screen_width, self.settings.screen_height))
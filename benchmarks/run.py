@@ -0,0 +1,169 @@
+"""Frame-time benchmark of the game loop on scripted scenarios.
+
+Every scenario drives a headless game for a number of frames, and the
+time of each phase of the frame (events, update, collision, culling,
+render and hud) is reported as mean, p95 and p99 in ms, along with the
+fill rate: the fraction of the screen pushed to the display per frame,
+and the collision broadphase counters: the pairs a brute-force test
+would have checked, the candidate pairs sharing a grid cell and the hits.
+
+Usage:
+    python -m benchmarks.run [scenario ...] [--frames N] [--output FILE]
+    python -m benchmarks.run --renderer full
+    python -m benchmarks.run --baseline benchmarks/baseline.json
+    python -m benchmarks.run --save-baseline benchmarks/baseline.json
+    python -m benchmarks.run --replay session.rec
+
+A recording (see alien_invasion.py --record) can be replayed as a
+scenario, to measure a real session.
+
+Compared with a baseline, a phase regresses when its mean or p95 got
+slower by more than the tolerance, and the benchmark exits with status 1
+(p99 is reported, but is too noisy on short runs to compare). Baselines
+depend on the machine, so save one before comparing against it.
+"""
+import argparse
+import json
+import sys
+
+from alien_invasion import AlienInvasion
+from profiler import Profiler
+from renderer import create_renderer
+from benchmarks.scenarios import SCENARIOS, ReplayScenario
+
+# Phases faster than this (in ms) are too noisy to regress.
+MIN_REGRESSION = 0.05
+# The statistics compared with the baseline.
+COMPARED_STATS = ('mean', 'p95')
+
+
+def run_scenario(scenario, frames, render_mode, warmup=30):
+    """Run a scenario and return the summary of its phases, its fill
+    rate, its collision counters, its pool stats and its sound
+    counters."""
+    game = AlienInvasion(headless=True, render_mode=render_mode,
+                         seed=scenario.seed)
+    if scenario.max_frames is not None:
+        frames = max(0, min(frames, scenario.max_frames - warmup))
+    scenario.setup(game)
+    for frame in range(warmup + frames):
+        if frame == warmup:
+            game.profiler = Profiler()
+            game.renderer = create_renderer(game)
+            for grid in (game.enemies.grid, game.bullets.grid,
+                         game.powerup_counters, game.sound):
+                grid.reset_counters()
+        scenario.before_frame(game, frame)
+        game.profiler.start_frame()
+        game.step()
+        game._update_screen()
+        game.profiler.end_frame()
+        game._prefetch_next_level()
+    return (game.profiler.summary(), game.renderer.fill_rate(),
+            game.collision_counters(), game.pool_stats(),
+            game.sound.counters())
+
+
+def compare(results, baseline, tolerance):
+    """Return a description of every phase that regressed."""
+    regressions = []
+    for name, phases in baseline['scenarios'].items():
+        for phase, base_stats in phases.items():
+            stats = results['scenarios'].get(name, {}).get(phase)
+            if stats is None:
+                continue
+            for stat in COMPARED_STATS:
+                value, base = stats[stat], base_stats[stat]
+                if (value > base * (1 + tolerance)
+                        and value - base > MIN_REGRESSION):
+                    regressions.append(
+                        f"{name} {phase} {stat}: {value:.3f}ms "
+                        f"(baseline {base:.3f}ms)")
+    return regressions
+
+
+def print_results(results, scenarios):
+    for name, phases in results['scenarios'].items():
+        print(f"{name} - {scenarios[name].description}")
+        print(f"  fill rate ({results['renderer']} renderer): "
+              f"{results['fill_rate'][name]:.1%} of the screen per frame")
+        for grid, counters in results['collisions'][name].items():
+            print(f"  {grid} collisions: {counters['brute_pairs']} pairs, "
+                  f"{counters['candidates']} candidates, "
+                  f"{counters['hits']} hits")
+        for pool, stats in results['pools'][name].items():
+            print(f"  {pool} pool: {stats['size']} slots, "
+                  f"{stats['created']} created, {stats['reused']} reused "
+                  f"({stats['reuse_rate']:.1%})")
+        sound = results['sound'][name]
+        print(f"  sounds: {sound['triggers']} triggered, {sound['played']} "
+              f"played, {sound['coalesced']} coalesced, "
+              f"{sound['rate_limited']} rate-limited")
+        print(f"  {'phase':<10}{'mean':>10}{'p95':>10}{'p99':>10}")
+        for phase, stats in phases.items():
+            print(f"  {phase:<10}{stats['mean']:>10.3f}"
+                  f"{stats['p95']:>10.3f}{stats['p99']:>10.3f}")
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('scenarios', nargs='*',
+                        help='scenarios to run: ' + ', '.join(SCENARIOS)
+                             + ' (default: all)')
+    parser.add_argument('--frames', type=int, default=600)
+    parser.add_argument('--replay', action='append', default=[],
+                        metavar='FILE', help='also run a recorded session')
+    parser.add_argument('--renderer', choices=['dirty', 'full'],
+                        default='dirty')
+    parser.add_argument('--output', help='write the results to a json file')
+    parser.add_argument('--baseline', help='compare with a results file')
+    parser.add_argument('--save-baseline', metavar='FILE',
+                        help='write the results as the new baseline')
+    parser.add_argument('--tolerance', type=float, default=0.25,
+                        help='allowed slowdown over the baseline '
+                             '(default: 0.25)')
+    return parser.parse_args()
+
+
+def main():
+    args = parse_args()
+    names = args.scenarios or ([] if args.replay else list(SCENARIOS))
+    unknown = set(names) - set(SCENARIOS)
+    if unknown:
+        sys.exit(f"Unknown scenarios: {', '.join(sorted(unknown))}")
+    scenarios = dict(SCENARIOS)
+    for filename in args.replay:
+        scenario = ReplayScenario(filename)
+        scenarios[scenario.name] = scenario
+        names.append(scenario.name)
+    results = {'frames': args.frames, 'renderer': args.renderer,
+               'scenarios': {}, 'fill_rate': {}, 'collisions': {},
+               'pools': {}, 'sound': {}}
+    for name in names:
+        phases, fill_rate, collisions, pools, sound = run_scenario(
+            scenarios[name], args.frames, args.renderer)
+        results['scenarios'][name] = phases
+        results['fill_rate'][name] = fill_rate
+        results['collisions'][name] = collisions
+        results['pools'][name] = pools
+        results['sound'][name] = sound
+    print_results(results, scenarios)
+
+    for filename in (args.output, args.save_baseline):
+        if filename:
+            with open(filename, 'w') as file_object:
+                json.dump(results, file_object, indent=2)
+
+    if args.baseline:
+        with open(args.baseline) as file_object:
+            baseline = json.load(file_object)
+        regressions = compare(results, baseline, args.tolerance)
+        for regression in regressions:
+            print("REGRESSION", regression)
+        if regressions:
+            sys.exit(1)
+        print("No regressions against", args.baseline)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,158 @@
+"""Scripted scenarios for the frame-time benchmark.
+
+Every scenario sets up a game, and then keeps it in the state it
+measures before each frame (e.g. refills the fleet or the bullets),
+outside of the timed part of the frame.
+"""
+import os.path
+
+from levels import load_level_data, load_level_file
+from powerup import LifePowerUp, ShieldPowerUp, WeaponPowerUp
+from replay import Replay
+
+
+class Scenario:
+    """A named, repeatable workload for the game loop."""
+
+    # The most frames the scenario can run, if it's limited.
+    max_frames = None
+
+    def __init__(self, name, description, level_data, seed=0):
+        self.name = name
+        self.description = description
+        self.level_data = level_data
+        self.seed = seed
+        self.fleet_size = 0
+
+    def setup(self, game):
+        """Start a game with the scenario's fleet."""
+        game.random.seed(self.seed)
+        game._start_game()
+        self.populate(game)
+
+    def populate(self, game):
+        """Replace the fleet with the scenario's fleet."""
+        if not game.stats.game_active:
+            game._start_game()
+        game.enemies.empty()
+        game.settings.fleet_direction = 1
+        level_data = self.level_data()
+        for y_idx, row in enumerate(level_data):
+            for x_idx, level in enumerate(row):
+                if level:
+                    game._create_enemy(x_idx, y_idx, level)
+        self.fleet_size = len(game.enemies)
+
+    def before_frame(self, game, frame):
+        """Keep the game in the measured state."""
+        if not game.stats.game_active or not game.enemies:
+            self.populate(game)
+        # Sweep the ship from side to side.
+        sweep_left = (frame // 90) % 2 == 1
+        game.ship.moving_left = sweep_left
+        game.ship.moving_right = not sweep_left
+
+
+class FullFleet(Scenario):
+    """The fleet is kept complete and is never shot at."""
+
+    def setup(self, game):
+        super().setup(game)
+        # Keep the fleet at the same height for the whole run.
+        game.settings.fleet_drop_speed = 0
+
+    def before_frame(self, game, frame):
+        if len(game.enemies) < self.fleet_size:
+            self.populate(game)
+        super().before_frame(game, frame)
+
+
+class BulletCap(Scenario):
+    """The player's bullet cap is always filled, and enemies keep shooting."""
+
+    def before_frame(self, game, frame):
+        super().before_frame(game, frame)
+        game._fire_bullet()
+        if frame % 4 == 0:
+            game._enemy_shoots()
+
+
+class BulletHell(Scenario):
+    """Hundreds of player bullets against a fleet that doesn't drop."""
+
+    bullets_allowed = 400
+
+    def setup(self, game):
+        super().setup(game)
+        game.settings.bullets_allowed = self.bullets_allowed
+        game.settings.fleet_drop_speed = 0
+
+    def before_frame(self, game, frame):
+        super().before_frame(game, frame)
+        game.settings.player_bullet_speed = 2
+        for _ in range(2):
+            game._fire_bullet()
+
+
+class LevelUp(Scenario):
+    """The fleet is wiped out every few frames, so the game keeps moving
+    on to the next level."""
+
+    frames_per_level = 20
+
+    def before_frame(self, game, frame):
+        if frame % self.frames_per_level == 0:
+            if game.stats.level >= game.settings.MAX_LEVEL:
+                # Start over, the next level is level 1 again.
+                game.stats.level = 0
+            game.enemies.empty()
+        super().before_frame(game, frame)
+
+    def populate(self, game):
+        # Keep the levels of the game, only a lost game starts over.
+        if not game.stats.game_active:
+            game._start_game()
+
+
+class AllPowerups(Scenario):
+    """Powerups of every kind are always falling."""
+
+    powerups_per_kind = 3
+
+    def before_frame(self, game, frame):
+        super().before_frame(game, frame)
+        kinds = (LifePowerUp, ShieldPowerUp, WeaponPowerUp)
+        while len(game.powerups) < self.powerups_per_kind * len(kinds):
+            game.powerups.drop(game.random.choice(kinds))
+
+
+class ReplayScenario(Scenario):
+    """A recorded session, played back frame by frame."""
+
+    def __init__(self, filename):
+        self.replay = Replay.load(filename)
+        super().__init__('replay:' + os.path.basename(filename),
+                         f'replay of {filename}', None, self.replay.seed)
+        self.max_frames = self.replay.frames
+
+    def setup(self, game):
+        game.start_replay(self.replay)
+
+    def before_frame(self, game, frame):
+        pass
+
+
+SCENARIOS = {
+    scenario.name: scenario for scenario in [
+        FullFleet('demo_level', 'demo_level.csv fully populated',
+                  lambda: load_level_file('levels/demo_level.csv')),
+        BulletCap('bullet_cap', 'bullet cap filled against level 20',
+                  lambda: load_level_data(20)),
+        BulletHell('bullet_hell', '400 player bullets against level 20',
+                   lambda: load_level_data(20)),
+        LevelUp('level_up', 'a new level every 20 frames',
+                lambda: load_level_data(1)),
+        AllPowerups('powerups', 'all powerups on screen on level 1',
+                    lambda: load_level_data(1)),
+    ]
+}
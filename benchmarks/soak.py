@@ -0,0 +1,203 @@
+"""Soak test: the autopilot plays headless games back to back for hours.
+
+The autopilot (see controller.py) plays every level, and a new game is
+started whenever one is lost or won. Every frame is simulated and drawn
+(to the dummy display) as fast as the CPU allows, and for every window
+of --report seconds the runner reports the frame time (mean and p99),
+the memory of the process (its resident size and the number of objects
+the garbage collector tracks) and the entities alive at the end of the
+window: enemies, player and enemy bullets, powerups and the timers
+queued on the scheduler. Frame time drift and memory growth are
+measured against the second window; the first is the warm-up.
+
+It fails (exit status 1) if the frame time drifted by more than
+--max-drift or the memory grew by more than --max-growth MB.
+
+Usage:
+    python -m benchmarks.soak [--minutes M] [--report S] [--seed N]
+                              [--no-render] [--output FILE]
+"""
+import argparse
+import gc
+import json
+import os
+import resource
+import sys
+from time import perf_counter
+
+os.environ.setdefault('SDL_VIDEODRIVER', 'dummy')
+os.environ.setdefault('SDL_AUDIODRIVER', 'dummy')
+
+import numpy as np
+
+from alien_invasion import AlienInvasion
+from bullet import ENEMY, PLAYER
+
+
+def memory_mb():
+    """Return the resident size of the process in MB (its peak size
+    where the current one isn't known)."""
+    try:
+        with open('/proc/self/statm') as statm:
+            pages = int(statm.read().split()[1])
+        return pages * resource.getpagesize() / 2 ** 20
+    except (OSError, IndexError, ValueError):
+        # In KB on Linux, bytes on macOS.
+        peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        return peak / (2 ** 20 if sys.platform == 'darwin' else 2 ** 10)
+
+
+def entity_counts(game):
+    return {
+        'enemies': len(game.enemies),
+        'player_bullets': game.bullets.count_owner(PLAYER),
+        'enemy_bullets': game.bullets.count_owner(ENEMY),
+        'powerups': len(game.powerups),
+        'timers': len(game.events.scheduler),
+    }
+
+
+class Progress:
+    """The games played by the autopilot: how many, the levels cleared,
+    the highest level reached and the games won."""
+
+    def __init__(self, game):
+        self.game = game
+        self.games = 1
+        self.wins = 0
+        self.levels_cleared = 0
+        self.highest_level = game.stats.level
+        self.level = game.stats.level
+        self.active = True
+
+    def update(self):
+        stats = self.game.stats
+        if stats.level > self.level:
+            self.levels_cleared += stats.level - self.level
+        self.level = stats.level
+        self.highest_level = max(self.highest_level, stats.level)
+        if self.active and not stats.game_active:
+            self.wins += stats.win_game
+        elif stats.game_active and not self.active:
+            self.games += 1
+        self.active = stats.game_active
+
+
+def soak(minutes, report, seed, render, output=None):
+    """Run the soak test for minutes of wall time, and return the
+    report of every window."""
+    game = AlienInvasion(headless=True, seed=seed)
+    game.use_autopilot()
+    game._start_game()
+    progress = Progress(game)
+    windows = []
+    end = perf_counter() + minutes * 60
+    while perf_counter() < end:
+        times = []
+        window_end = min(perf_counter() + report, end)
+        while perf_counter() < window_end:
+            start = perf_counter()
+            game.step()
+            if render:
+                game._update_screen()
+            game._prefetch_next_level()
+            times.append(perf_counter() - start)
+            progress.update()
+        times = np.array(times) * 1000
+        window = {
+            'minutes': round((len(windows) + 1) * report / 60, 2),
+            'frames': len(times),
+            'mean_ms': float(times.mean()),
+            'p99_ms': float(np.percentile(times, 99)),
+            'memory_mb': memory_mb(),
+            'gc_objects': len(gc.get_objects()),
+            'games': progress.games,
+            'wins': progress.wins,
+            'levels_cleared': progress.levels_cleared,
+            'highest_level': progress.highest_level,
+            'entities': entity_counts(game),
+        }
+        windows.append(window)
+        if len(windows) == 1:
+            _print_header()
+        # The first window is the warm-up, and the second the reference.
+        _print_window(window, windows[min(1, len(windows) - 1)])
+        if output:
+            output.write(json.dumps(window) + '\n')
+            output.flush()
+    return windows
+
+
+def _print_header():
+    print(f"{'min':>6}{'frames':>8}{'mean ms':>9}{'p99 ms':>8}"
+          f"{'drift':>8}{'MB':>8}{'objects':>9}{'games':>7}"
+          f"{'levels':>8}{'best':>6}  entities")
+
+
+def _print_window(window, reference):
+    drift = window['mean_ms'] / reference['mean_ms'] - 1
+    entities = ' '.join(f"{name}={count}"
+                        for name, count in window['entities'].items())
+    print(f"{window['minutes']:>6.1f}{window['frames']:>8}"
+          f"{window['mean_ms']:>9.3f}{window['p99_ms']:>8.3f}{drift:>8.1%}"
+          f"{window['memory_mb']:>8.1f}{window['gc_objects']:>9}"
+          f"{window['games']:>7}{window['levels_cleared']:>8}"
+          f"{window['highest_level']:>6}  {entities}", flush=True)
+
+
+def check(windows, max_drift, max_growth):
+    """Return a description of every limit the soak test broke, from
+    the reference window to the last."""
+    if len(windows) < 3:
+        return []
+    first, last = windows[1], windows[-1]
+    failures = []
+    drift = last['mean_ms'] / first['mean_ms'] - 1
+    if drift > max_drift:
+        failures.append(f"frame time drifted by {drift:.0%} "
+                        f"(limit {max_drift:.0%})")
+    growth = last['memory_mb'] - first['memory_mb']
+    if growth > max_growth:
+        failures.append(f"memory grew by {growth:.1f} MB "
+                        f"(limit {max_growth} MB)")
+    return failures
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--minutes', type=float, default=10,
+                        help='how long to run, in minutes (default: 10)')
+    parser.add_argument('--report', type=float, default=60,
+                        help='seconds between reports (default: 60)')
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--no-render', dest='render', action='store_false',
+                        help="simulate only, don't draw the frames")
+    parser.add_argument('--max-drift', type=float, default=0.5,
+                        help='most frame time drift allowed, as a fraction '
+                             'of the reference window (default: 0.5)')
+    parser.add_argument('--max-growth', type=float, default=50,
+                        help='most memory growth allowed, in MB '
+                             '(default: 50)')
+    parser.add_argument('--output', metavar='FILE',
+                        help='also write every window to FILE, as JSON lines')
+    return parser.parse_args()
+
+
+def main():
+    args = parse_args()
+    output = open(args.output, 'w') if args.output else None
+    try:
+        windows = soak(args.minutes, args.report, args.seed, args.render,
+                       output)
+    finally:
+        if output:
+            output.close()
+    failures = check(windows, args.max_drift, args.max_growth)
+    for failure in failures:
+        print(f"FAILED: {failure}")
+    if failures:
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,84 @@
+"""Startup-time benchmark: time to first frame and time to playable.
+
+Every run starts the game in a new process (with the dummy display and
+audio drivers), shows the Play screen and keeps drawing it until the
+images and sounds loaded in the background are in. The imports are
+timed on their own (they vary a lot from run to run), and the rest from
+the creation of the game. The game is started with the deferred loading
+and with everything loaded before the first frame (asset_loader_threads
+0), each with the images decoded from their files or taken from the
+baked cache (see asset_cache.py; it's baked before the runs).
+
+Usage: python -m benchmarks.startup [runs]
+"""
+import json
+import os
+import statistics
+import subprocess
+import sys
+from time import perf_counter
+
+# Started here, before the game's modules are imported.
+_START = perf_counter()
+
+# (loader_threads, asset_cache) of every mode.
+MODES = {
+    'deferred': (None, False),
+    'eager': (0, False),
+    'deferred, baked': (None, True),
+    'eager, baked': (0, True),
+}
+
+
+def measure(loader_threads, asset_cache):
+    """Start a game, run its Play screen until it's playable, and
+    return its startup times in ms."""
+    os.environ.setdefault('SDL_VIDEODRIVER', 'dummy')
+    os.environ.setdefault('SDL_AUDIODRIVER', 'dummy')
+    import pygame
+    from alien_invasion import AlienInvasion
+
+    game = AlienInvasion(loader_threads=loader_threads,
+                         asset_cache=asset_cache)
+    clock = pygame.time.Clock()
+    game._update_screen()
+    while not game.ready:
+        clock.tick(game.settings.FPS)
+        game._update_screen()
+    game._start_game()
+    times = game.startup_times
+    created = times['created']
+    return {
+        'imports': (created - _START) * 1000,
+        'first_frame': (times['first_frame'] - created) * 1000,
+        'playable': (times['playable'] - created) * 1000,
+        'started': (perf_counter() - created) * 1000,
+    }
+
+
+def main():
+    if len(sys.argv) > 2 and sys.argv[1] == '--child':
+        print(json.dumps(measure(*MODES[sys.argv[2]])))
+        return
+    runs = int(sys.argv[1]) if len(sys.argv) > 1 else 5
+    # Bake the cache (if it's stale) before timing anything.
+    subprocess.run([sys.executable, '-m', 'benchmarks.startup', '--child',
+                    'eager, baked'], capture_output=True, check=True)
+    print(f"{'mode':<17}{'imports':>10}{'first frame':>13}{'playable':>11}"
+          f"{'started':>10}   (median of {runs} runs, ms)")
+    for mode in MODES:
+        results = []
+        for _ in range(runs):
+            output = subprocess.run(
+                [sys.executable, '-m', 'benchmarks.startup', '--child', mode],
+                capture_output=True, text=True, check=True).stdout
+            results.append(json.loads(output.splitlines()[-1]))
+        median = {key: statistics.median(result[key] for result in results)
+                  for key in results[0]}
+        print(f"{mode:<17}{median['imports']:>10.1f}"
+              f"{median['first_frame']:>13.1f}"
+              f"{median['playable']:>11.1f}{median['started']:>10.1f}")
+
+
+if __name__ == '__main__':
+    main()
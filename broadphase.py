@@ -0,0 +1,179 @@
+import numpy as np
+
+# Cell coordinates are offset so that rects partly off the screen
+# still get non-negative cell keys.
+_CELL_OFFSET = 1 << 10
+_CELL_STRIDE = 1 << 12
+
+
+def _cell_key(cell_x, cell_y):
+    return (cell_y + _CELL_OFFSET) * _CELL_STRIDE + cell_x + _CELL_OFFSET
+
+
+def _cells(lefts, tops, widths, heights, cell_size):
+    """Return (owners, keys): the key of every grid cell covered by each
+    rect, and the index of the rect covering it. A key may be repeated
+    for the same rect."""
+    x0 = lefts // cell_size
+    y0 = tops // cell_size
+    n = len(lefts)
+    if n and max(widths.max(), heights.max()) <= cell_size:
+        # Every rect covers at most 2x2 cells: take the cells of its
+        # four corners.
+        x1 = (lefts + widths - 1) // cell_size
+        y1 = (tops + heights - 1) // cell_size
+        keys = np.concatenate([_cell_key(x0, y0), _cell_key(x1, y0),
+                               _cell_key(x0, y1), _cell_key(x1, y1)])
+        return np.tile(np.arange(n), 4), keys
+    columns = np.maximum((lefts + widths - 1) // cell_size - x0 + 1, 0)
+    rows = np.maximum((tops + heights - 1) // cell_size - y0 + 1, 0)
+    counts = columns * rows
+    total = int(counts.sum())
+    owners = np.repeat(np.arange(len(lefts)), counts)
+    # The position of every cell within its rect's block of cells.
+    starts = np.cumsum(counts) - counts
+    local = np.arange(total) - np.repeat(starts, counts)
+    owner_columns = columns[owners]
+    cell_x = x0[owners] + local % owner_columns
+    cell_y = y0[owners] + local // owner_columns
+    return owners, _cell_key(cell_x, cell_y)
+
+
+def occupancy(masks):
+    """Return the summed-area tables of the bits of masks (boolean arrays
+    by row), stacked and padded to the largest: tables[i, r, c] is the
+    number of bits set in mask i above row r and left of column c."""
+    rows = max(bits.shape[0] for bits in masks)
+    columns = max(bits.shape[1] for bits in masks)
+    tables = np.zeros((len(masks), rows + 1, columns + 1), dtype=np.int32)
+    for table, bits in zip(tables, masks):
+        height, width = bits.shape
+        table[1:height + 1, 1:width + 1] = bits.cumsum(0).cumsum(1)
+        # Past the mask, the counts stay those of its last row and column.
+        table[height + 1:, 1:width + 1] = table[height, 1:width + 1]
+        table[:, width + 1:] = table[:, width:width + 1]
+    return tables
+
+
+def rects_hit(tables, which, lefts, tops, width, height):
+    """Return whether every rect of size (width, height) at (lefts, tops),
+    relative to its mask (which, an index of tables), covers a set bit.
+
+    The same as the overlap of the mask with a filled mask of the rect,
+    in four lookups per rect.
+    """
+    _, rows, columns = tables.shape
+    top = np.clip(tops, 0, rows - 1)
+    bottom = np.clip(tops + height, 0, rows - 1)
+    left = np.clip(lefts, 0, columns - 1)
+    right = np.clip(lefts + width, 0, columns - 1)
+    counts = (tables[which, bottom, right] - tables[which, top, right]
+              - tables[which, bottom, left] + tables[which, top, left])
+    return counts > 0
+
+
+class CollisionCounters:
+    """Count the work of a collision check.
+
+    brute_pairs is the number of pairs a full test would have checked,
+    candidates the pairs the broadphase kept, overlaps the candidates
+    whose rects overlap and hits the pairs confirmed by the exact (mask)
+    test.
+    """
+
+    def __init__(self):
+        self.reset_counters()
+
+    def reset_counters(self):
+        self.brute_pairs = 0
+        self.candidates = 0
+        self.overlaps = 0
+        self.hits = 0
+
+    def counters(self):
+        """Return the counters as a dict."""
+        return {
+            'brute_pairs': self.brute_pairs,
+            'candidates': self.candidates,
+            'overlaps': self.overlaps,
+            'hits': self.hits,
+        }
+
+
+class SpatialHash(CollisionCounters):
+    """A uniform-grid broadphase for rect collisions.
+
+    The grid is rebuilt from the rects of the items (e.g. the fleet)
+    whenever they move, and queried with the rects of the things that may
+    hit them (e.g. bullets). Only the pairs that share a grid cell are
+    tested, so the cost follows the number of contacts instead of the
+    number of items times the number of queries. The cells are only
+    computed when the grid is first queried with pairs(); a single rect
+    is checked directly against the items' rects by query().
+    The counters show how much work the broadphase saved.
+    """
+
+    def __init__(self, cell_size):
+        super().__init__()
+        self.cell_size = cell_size
+        self.build(*[np.zeros(0, dtype=int)] * 4)
+
+    def build(self, lefts, tops, widths, heights):
+        """Fill the grid with the rects of the items, given as arrays."""
+        self.item_count = len(lefts)
+        self.lefts, self.tops = lefts, tops
+        self.widths, self.heights = widths, heights
+        self.rights, self.bottoms = lefts + widths, tops + heights
+        self.keys = self.items = None
+
+    def _build_cells(self):
+        """Sort the items by the keys of the cells they cover."""
+        items, keys = _cells(self.lefts, self.tops, self.widths,
+                             self.heights, self.cell_size)
+        order = np.argsort(keys, kind='stable')
+        self.keys = keys[order]
+        self.items = items[order]
+
+    def pairs(self, lefts, tops, widths, heights):
+        """Return (queries, items): the index of every query rect and of
+        every item whose rects overlap, sorted by query and then item."""
+        self.brute_pairs += len(lefts) * self.item_count
+        if self.keys is None:
+            self._build_cells()
+        queries, keys = _cells(lefts, tops, widths, heights, self.cell_size)
+
+        # Every (query, item) pair sharing a cell.
+        first = np.searchsorted(self.keys, keys, 'left')
+        counts = np.searchsorted(self.keys, keys, 'right') - first
+        total = int(counts.sum())
+        starts = np.cumsum(counts) - counts
+        slots = np.repeat(first - starts, counts) + np.arange(total)
+        pair_queries = np.repeat(queries, counts)
+        pair_items = self.items[slots]
+
+        # Pairs sharing several cells are counted once.
+        codes = np.unique(pair_queries * max(self.item_count, 1) + pair_items)
+        pair_queries = codes // max(self.item_count, 1)
+        pair_items = codes % max(self.item_count, 1)
+        self.candidates += len(codes)
+
+        overlap = ((lefts[pair_queries] < self.rights[pair_items])
+                   & (lefts[pair_queries] + widths[pair_queries]
+                      > self.lefts[pair_items])
+                   & (tops[pair_queries] < self.bottoms[pair_items])
+                   & (tops[pair_queries] + heights[pair_queries]
+                      > self.tops[pair_items]))
+        self.overlaps += int(overlap.sum())
+        return pair_queries[overlap], pair_items[overlap]
+
+    def query(self, rect):
+        """Return the indices of the items whose rects overlap rect,
+        sorted."""
+        left, top, width, height = rect
+        self.brute_pairs += self.item_count
+        overlap = ((left < self.rights) & (left + width > self.lefts)
+                   & (top < self.bottoms) & (top + height > self.tops))
+        items = np.flatnonzero(overlap)
+        self.candidates += len(items)
+        self.overlaps += len(items)
+        return items
@@ -1,27 +1,36 @@
+import math
+
+import numpy as np
 import pygame
-from pygame.sprite import Sprite
 
-class Bullet(Sprite):
-    """A class to manage bullets fired from the ship"""
+from broadphase import SpatialHash, rects_hit
+from enemy import Enemy
 
-    def __init__(self, ai_game):
-        """Create a bullet object at the ship's current position."""
-        super().__init__()
-        self.screen = ai_game.screen
-        self.settings = ai_game.settings
-        
-        # Create a bullet rect at (0,0) and then set correct position.
-        self.rect = pygame.Rect(0, 0, self.settings.bullet_width,
-            self.settings.bullet_height)
-        self.mask = pygame.mask.Mask(self.rect.size)
-        self.mask.fill()
+# Who fired a bullet.
+PLAYER = 0
+ENEMY = 1
+
+
+def round_coords(values):
+    """Round an array of coordinates the way pygame.Rect does,
+    with halves away from zero."""
+    return np.copysign(np.floor(np.abs(values) + 0.5), values).astype(int)
 
-    def draw_bullet(self):
-        """Draw the bullet to the screen."""
-        pygame.draw.rect(self.screen, self.color, self.rect)
 
+def round_coord(value):
+    """Round one coordinate like round_coords."""
+    return int(math.copysign(math.floor(abs(value) + 0.5), value))
+
+
+class Bullets:
+    """A class to manage all the bullets fired in the game.
+
+    Every bullet is a row in NumPy arrays: the left and the (decimal) top
+    of its rect, its vertical velocity, its power and its owner, PLAYER
+    or ENEMY. The first count rows are the live bullets, in the order
+    they were fired, so they're all moved, culled and drawn in batches.
+    """
 
-class PlayerBullet(Bullet):
     bullet_level_color = {
         1: (224, 222, 58),
         2: (255, 46, 204),
@@ -31,34 +40,202 @@ class PlayerBullet(Bullet):
         6: (43, 151, 32),
         7: (250, 130, 76),
     }
-    def __init__(self, ai_game):
-        super().__init__(ai_game)
-        self.power = min(ai_game.stats.weapon_power, 7)
-        self.color = PlayerBullet.bullet_level_color[self.power]
-        # Put the bullet so it's coming out the Player ship.
-        self.rect.midtop = ai_game.ship.rect.midtop
-        # Store the bullet's position as a decimal value.
-        self.y = float(self.rect.y)
-    
-    def update(self):
-        """Move the bullet up the screen."""
-        # Update the decimal position of the bullet.
-        self.y -= self.settings.player_bullet_speed
-        # Update the rect position.
-        self.rect.y = self.y
-
-class EnemyBullet(Bullet):
-    def __init__(self, ai_game, alien):
-        super().__init__(ai_game)
-        self.color = self.settings.enemy_bullet_color
-        # Put the bullet so it's coming out the Enemy ship.
-        self.rect.midbottom = alien.rect.midbottom
-        # Store the bullet's position as a decimal value.
-        self.y = float(self.rect.y)
-    
+
+    def __init__(self, ai_game, capacity=32):
+        """Create an empty set of bullets."""
+        self.screen = ai_game.screen
+        self.settings = ai_game.settings
+        self.width = self.settings.bullet_width
+        self.height = self.settings.bullet_height
+
+        # Used to place new bullets, like a bullet's rect would be.
+        self._rect = pygame.Rect(0, 0, self.width, self.height)
+        # The broadphase for bullets hitting a sprite.
+        self.grid = SpatialHash(self.settings.collision_cell_size)
+
+        self.count = 0
+        self.owner_count = [0, 0]
+        # Rows past count are free, and reused by the next bullets.
+        self.fired = 0
+        self.most_rows = 0
+        self.x = np.zeros(capacity, dtype=int)
+        self.y = np.zeros(capacity)
+        self.speed = np.zeros(capacity)
+        self.power = np.zeros(capacity, dtype=int)
+        self.owner = np.zeros(capacity, dtype=np.int8)
+
+        # A filled bullet image for every (owner, power).
+        self.images = {}
+        for power, color in self.bullet_level_color.items():
+            self.images[(PLAYER, power)] = self._bullet_image(color)
+        self.images[(ENEMY, 0)] = self._bullet_image(
+            self.settings.enemy_bullet_color)
+
+    def __len__(self):
+        return self.count
+
+    def _bullet_image(self, color):
+        image = pygame.Surface((self.width, self.height)).convert()
+        image.fill(color)
+        return image
+
+    def _arrays(self):
+        return [self.x, self.y, self.speed, self.power, self.owner]
+
+    def _add(self, owner, speed, power):
+        """Add a bullet at the position of self._rect."""
+        if self.count == len(self.x):
+            # Double the capacity of the arrays.
+            self.x, self.y, self.speed, self.power, self.owner = [
+                np.concatenate([array, np.zeros_like(array)])
+                for array in self._arrays()]
+        i = self.count
+        self.x[i] = self._rect.x
+        self.y[i] = self._rect.y
+        self.speed[i] = speed
+        self.power[i] = power
+        self.owner[i] = owner
+        self.count += 1
+        self.owner_count[owner] += 1
+        self.fired += 1
+        self.most_rows = max(self.most_rows, self.count)
+
+    def fire_player_bullet(self, ship, weapon_power):
+        """Fire a bullet from the top of the player's ship."""
+        self._rect.midtop = ship.rect.midtop
+        power = min(weapon_power, len(self.bullet_level_color))
+        self._add(PLAYER, -self.settings.player_bullet_speed, power)
+
+    def fire_enemy_bullet(self, enemy):
+        """Fire a bullet from the bottom of an enemy ship."""
+        self._rect.midbottom = enemy.rect.midbottom
+        self._add(ENEMY, self.settings.enemy_bullet_speed, 0)
+
+    def pool_stats(self):
+        """Return the size of the pool of rows and how often they were
+        reused."""
+        reused = self.fired - self.most_rows
+        return {
+            'size': len(self.x),
+            'active': self.count,
+            'created': self.most_rows,
+            'reused': reused,
+            'reuse_rate': reused / self.fired if self.fired else 0,
+        }
+
+    def count_owner(self, owner):
+        """Return how many live bullets owner fired."""
+        return self.owner_count[owner]
+
+    def tops(self):
+        """Return the top of the rect of every live bullet."""
+        return round_coords(self.y[:self.count])
+
     def update(self):
-        """Move the bullet up the screen."""
-        # Update the decimal position of the bullet.
-        self.y += self.settings.enemy_bullet_speed
-        # Update the rect position.
-        self.rect.y = self.y
\ No newline at end of file
+        """Move all the bullets."""
+        n = self.count
+        self.y[:n] += self.speed[:n]
+
+    def cull(self):
+        """Remove the bullets that have left the screen."""
+        if not self.count:
+            return
+        tops = self.tops()
+        owner = self.owner[:self.count]
+        gone = (((owner == PLAYER) & (tops + self.height <= 0))
+                | ((owner == ENEMY) & (tops >= self.settings.screen_height)))
+        if gone.any():
+            self._keep(~gone)
+
+    def remove(self, indices):
+        """Remove the bullets at indices."""
+        keep = np.ones(self.count, dtype=bool)
+        keep[list(indices)] = False
+        self._keep(keep)
+
+    def _keep(self, keep):
+        """Keep only the live bullets where keep is True, in order."""
+        n = self.count
+        removed = np.bincount(self.owner[:n][~keep], minlength=2)
+        for array in self._arrays():
+            kept = array[:n][keep]
+            array[:len(kept)] = kept
+        self.count = len(kept)
+        self.owner_count[PLAYER] -= int(removed[PLAYER])
+        self.owner_count[ENEMY] -= int(removed[ENEMY])
+
+    def empty(self):
+        """Remove all the bullets."""
+        self.count = 0
+        self.owner_count = [0, 0]
+
+    def _rects(self, indices):
+        """Return the lefts, tops, widths and heights of the bullets at
+        indices."""
+        sizes = np.ones(len(indices), dtype=int)
+        return (self.x[indices], self.tops()[indices],
+                sizes * self.width, sizes * self.height)
+
+    def collide_any(self, owner, sprite):
+        """Return the index of the first bullet of owner that hits sprite,
+        or None."""
+        indices = np.flatnonzero(self.owner[:self.count] == owner)
+        if not len(indices):
+            return None
+        lefts, tops, widths, heights = self._rects(indices)
+        self.grid.build(lefts, tops, widths, heights)
+        rect = sprite.rect
+        candidates = self.grid.query(rect)
+        if not len(candidates):
+            return None
+        hit = rects_hit(sprite.occupancy[None], 0,
+                        lefts[candidates] - rect.x, tops[candidates] - rect.y,
+                        self.width, self.height)
+        if not hit.any():
+            return None
+        self.grid.hits += 1
+        return int(indices[candidates[hit.argmax()]])
+
+    def collide(self, owner, fleet):
+        """Return a dict from the index of every bullet of owner that hits
+        enemies of the fleet to the list of enemies it hits."""
+        collisions = {}
+        if not fleet:
+            return collisions
+        indices = np.flatnonzero(self.owner[:self.count] == owner)
+        if not len(indices):
+            return collisions
+        enemies = fleet.enemies
+        enemy_lefts, enemy_tops = fleet.build_grid()
+        lefts, tops, widths, heights = self._rects(indices)
+        # Only the pairs sharing a grid cell get the exact test, against
+        # the occupancy of the enemy's image.
+        bullet_rows, enemy_rows = fleet.grid.pairs(lefts, tops, widths,
+                                                   heights)
+        hit = rects_hit(Enemy.occupancy, fleet.image[enemy_rows],
+                        lefts[bullet_rows] - enemy_lefts[enemy_rows],
+                        tops[bullet_rows] - enemy_tops[enemy_rows],
+                        self.width, self.height)
+        fleet.grid.hits += int(hit.sum())
+        for i, e in zip(bullet_rows[hit].tolist(), enemy_rows[hit].tolist()):
+            collisions.setdefault(int(indices[i]), []).append(enemies[e])
+        return collisions
+
+    def draw(self, alpha=1):
+        """Draw the player's bullets and then the enemies' bullets, alpha
+        of the way from where they were a step ago, and return the rects
+        they cover."""
+        n = self.count
+        order = np.argsort(self.owner[:n], kind='stable')
+        owners = self.owner[order].tolist()
+        powers = self.power[order].tolist()
+        xs = self.x[order].tolist()
+        if alpha == 1:
+            tops = self.tops()
+        else:
+            tops = round_coords(self.y[:n] - (1 - alpha) * self.speed[:n])
+        tops = tops[order].tolist()
+        images = self.images
+        return self.screen.blits(
+            [(images[(owner, power)], (x, top))
+             for owner, power, x, top in zip(owners, powers, xs, tops)])
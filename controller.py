@@ -0,0 +1,178 @@
+import numpy as np
+import pygame
+
+from bullet import ENEMY
+
+
+class Controller:
+    """What flies the player's ship.
+
+    The game hands the controller the keys that aren't its own (quitting,
+    Play, profiling), and calls update() once per step, after the input
+    events and before anything moves. A controller steers through the
+    ship's movement flags and fires with ai_game._fire_bullet().
+    """
+
+    def __init__(self, ai_game):
+        self.game = ai_game
+
+    def key_down(self, key):
+        pass
+
+    def key_up(self, key):
+        pass
+
+    def update(self):
+        pass
+
+
+class KeyboardController(Controller):
+    """The player: the arrow keys move the ship and space fires."""
+
+    # The movement flag of the ship every arrow key sets.
+    MOVES = {
+        pygame.K_RIGHT: 'moving_right',
+        pygame.K_LEFT: 'moving_left',
+        pygame.K_UP: 'moving_up',
+        pygame.K_DOWN: 'moving_down',
+    }
+
+    def key_down(self, key):
+        if key in self.MOVES:
+            setattr(self.game.ship, self.MOVES[key], True)
+        elif key == pygame.K_SPACE:
+            self.game._fire_bullet()
+
+    def key_up(self, key):
+        if key in self.MOVES:
+            setattr(self.game.ship, self.MOVES[key], False)
+
+
+class Autopilot(Controller):
+    """Play the game by itself, for demos and soak tests.
+
+    Every step it picks left, right or staying put: the move that keeps
+    the ship out of the way of the enemy bullets arriving within
+    settings.autopilot_lookahead steps, and among the safe moves the one
+    towards its goal. The goal is a falling powerup it can still catch,
+    or else the nearest enemy column, led by how far the fleet moves
+    while a bullet climbs to it. It fires whenever a bullet would meet
+    an enemy. With restart, it starts a new game once one is over.
+
+    It only looks at the game's state, so a game it plays is as
+    deterministic as the game's seed.
+    """
+
+    def __init__(self, ai_game, restart=True):
+        super().__init__(ai_game)
+        self.settings = ai_game.settings
+        self.restart = restart
+
+    def update(self):
+        game = self.game
+        ship = game.ship
+        ship.moving_up = ship.moving_down = False
+        if not game.stats.game_active:
+            ship.moving_left = ship.moving_right = False
+            if self.restart:
+                # It waits for the loading, so the game starts on the
+                # same step whether frames are drawn or not.
+                game._start_game()
+            return
+
+        goal = self._goal()
+        towards = 0
+        if goal is not None and abs(goal - ship.rect.centerx) > \
+                self.settings.ship_speed / 2:
+            towards = 1 if goal > ship.rect.centerx else -1
+        # The least threatened move, preferring the goal and then staying.
+        moves = sorted((-1, 0, 1),
+                       key=lambda move: (move != towards, move != 0))
+        move = min(moves, key=self._threat)
+        ship.moving_left = move < 0
+        ship.moving_right = move > 0
+
+        if self._aimed():
+            game._fire_bullet()
+
+    def _threat(self, move):
+        """Return how threatened the ship is if it keeps moving by move
+        (-1, 0 or 1): the enemy bullets that would hit it, the sooner
+        the worse."""
+        bullets = self.game.bullets
+        n = bullets.count
+        if not bullets.count_owner(ENEMY):
+            return 0
+        rect = self.game.ship.rect
+        enemy = bullets.owner[:n] == ENEMY
+        lefts = bullets.x[:n][enemy]
+        tops = bullets.tops()[enemy]
+        speeds = bullets.speed[:n][enemy]
+        # The steps until every bullet reaches the top of the ship, and
+        # until it has passed its bottom.
+        arrive = np.maximum(rect.top - (tops + bullets.height), 0) / speeds
+        leave = (rect.bottom - tops) / speeds
+        incoming = (leave > 0) & (arrive <= self.settings.autopilot_lookahead)
+        if not incoming.any():
+            return 0
+        lefts = lefts[incoming]
+        arrive, leave = arrive[incoming], leave[incoming]
+
+        # The span the ship sweeps while a bullet passes it.
+        last_left = self.settings.screen_width - rect.width
+        step = move * self.settings.ship_speed
+        start = np.clip(rect.x + step * arrive, 0, last_left)
+        end = np.clip(rect.x + step * leave, 0, last_left)
+        margin = self.settings.autopilot_margin
+        hit = ((lefts < np.maximum(start, end) + rect.width + margin)
+               & (lefts + bullets.width > np.minimum(start, end) - margin))
+        return float((1 / (1 + arrive[hit])).sum())
+
+    def _goal(self):
+        """Return the x the ship should head for, or None."""
+        rect = self.game.ship.rect
+        settings = self.settings
+        # The powerup that lands soonest among those it can catch.
+        catchable = []
+        for powerup in self.game.powerups.sprites():
+            steps = (rect.top - powerup.rect.bottom) / settings.powerup_speed
+            distance = abs(powerup.rect.centerx - rect.centerx)
+            if distance / settings.ship_speed <= steps:
+                catchable.append((steps, powerup.rect.centerx))
+        if catchable:
+            return min(catchable)[1]
+
+        centers = self._enemy_centers()
+        if centers is None:
+            return None
+        # The nearest of the lowest enemies: the fleet lands when they do.
+        fleet = self.game.enemies
+        n = len(fleet)
+        bottoms = fleet.y[:n] + fleet.height[:n]
+        lowest = bottoms > bottoms.max() - fleet.height[:n]
+        distances = np.where(lowest, np.abs(centers - rect.centerx), np.inf)
+        return float(centers[distances.argmin()])
+
+    def _enemy_centers(self):
+        """Return where the center of every enemy will be when a bullet
+        fired now reaches it, or None if there are no enemies."""
+        fleet = self.game.enemies
+        n = len(fleet)
+        if not n:
+            return None
+        rect = self.game.ship.rect
+        bottoms = fleet.y[:n] + fleet.height[:n]
+        climb = np.maximum(rect.top - bottoms, 0)
+        steps = climb / self.settings.player_bullet_speed
+        drift = self.settings.enemy_speed * self.settings.fleet_direction
+        return fleet.x[:n] + fleet.width[:n] / 2 + drift * steps
+
+    def _aimed(self):
+        """Return True if a bullet fired now would meet an enemy."""
+        centers = self._enemy_centers()
+        if centers is None:
+            return False
+        fleet = self.game.enemies
+        half_widths = fleet.width[:len(fleet)] / 2
+        return bool((np.abs(centers - self.game.ship.rect.centerx)
+                     < half_widths).any())
@@ -1,73 +1,129 @@
 import pygame
-import os.path
 from pygame.sprite import Sprite
 
+from assets import assets, image_path, mask_bits
+from broadphase import occupancy
+
+
+# The image color of every enemy level.
+ENEMY_COLORS = {
+    1: 'teal',
+    2: 'green',
+    3: 'purple',
+    4: 'blue',
+    5: 'grey',
+    6: 'orange',
+    7: 'yellow',
+    8: 'pink',
+    9: 'red',
+}
+
+
+class EnemyState:
+    """The look of an enemy of a given level with a given life left."""
+
+    def __init__(self, image, mask, image_index):
+        self.image = image
+        self.mask = mask
+        # The index of the image in Enemy.occupancy.
+        self.image_index = image_index
+        self.size = image.get_size()
+        # The box around the visible pixels, relative to the image.
+        bounding_rects = mask.get_bounding_rects()
+        if bounding_rects:
+            self.bounding_rect = bounding_rects[0].unionall(bounding_rects)
+        else:
+            self.bounding_rect = pygame.Rect(0, 0, 0, 0)
+
 
 class Enemy(Sprite):
-    """A class to represent a single enemy in the fleet."""
+    """A class to represent a single enemy in the fleet.
 
-    def __init__(self, ai_game, level=1):
-        """Initialize the enemy and set its starting position."""
-        super().__init__()
-        self.screen = ai_game.screen
-        self.settings = ai_game.settings
-        self.stats = ai_game.stats
-        self._load_enemy_images()
+    The position, life and level of the enemy are kept in the arrays of
+    its fleet, at row index. The enemy itself holds what it looks like.
+    Once it's removed from the fleet, its index is None.
+    """
 
-        # Setup life and lives of the enemy
-        self.x, self.y = 0, 0
-        self.level = level
-        self.life = level
+    # EnemyState for every (level, life) pair, shared by all the enemies.
+    states = {}
+    # The summed-area tables of the masks of the enemy images, stacked,
+    # for bullets hitting enemies (see broadphase.rects_hit).
+    occupancy = None
+
+    def __init__(self, fleet, index):
+        """Initialize the enemy of the fleet at row index."""
+        super().__init__()
+        self.fleet = fleet
+        self.index = index
+        self.load_states()
 
         # Load image according to the enemy level
         self.update_image()
 
-    def drop_verticaly(self):
-        self.y += self.settings.fleet_drop_speed
+    @property
+    def x(self):
+        return self.fleet.x[self.index]
 
-    def update(self):
-        """Move the enemy to the right."""
-        self.x += (self.settings.enemy_speed *
-                   self.settings.fleet_direction)
-        self.rect.x = self.x
-        self.rect.y = self.y
+    @x.setter
+    def x(self, x):
+        self.fleet.x[self.index] = x
+        self.fleet.changed()
 
-    def check_edges(self):
-        """Return True if enemy is at the edge of the screen."""
-        screen_rect = self.screen.get_rect()
-        if self.rect.right >= screen_rect.right or self.rect.left <= 0:
-            return True
+    @property
+    def y(self):
+        return self.fleet.y[self.index]
+
+    @y.setter
+    def y(self, y):
+        self.fleet.y[self.index] = y
+        self.fleet.changed()
+
+    @property
+    def life(self):
+        return int(self.fleet.life[self.index])
+
+    @life.setter
+    def life(self, life):
+        self.fleet.life[self.index] = life
+
+    @property
+    def level(self):
+        return int(self.fleet.level[self.index])
+
+    @property
+    def rect(self):
+        """A new rect at the current position of the enemy."""
+        return self.fleet.rect(self.index)
 
     def update_image(self):
-        # Load the enemy image and set its rect attritbute.
-        if self.life > len(self.images):
-            image_idx = len(self.images) - 1
-        else:
-            image_idx = self.life - 1
-        self.image = self.images[image_idx]
-        self.mask = pygame.mask.from_surface(self.image)
-        self.rect = self.image.get_rect()
-        self.rect.x = self.x
-        self.rect.y = self.y
-
-    def _load_enemy_images(self):
-        """Load all possible alien ship images"""
-        self.images = []
-        image_color_dict = {
-            1: 'teal',
-            2: 'green',
-            3: 'purple',
-            4: 'blue',
-            5: 'grey',
-            6: 'orange',
-            7: 'yellow',
-            8: 'pink',
-            9: 'red',
-        }
+        """Show the image matching the enemy's level and life left."""
+        state = self.states[(self.level, self.life)]
+        self.image = state.image
+        self.mask = state.mask
+        self.bounding_rect = state.bounding_rect
+        self.fleet.set_image(self.index, state)
+
+    @classmethod
+    def load_states(cls):
+        """Build the table of enemy states the first time it's needed.
 
+        The game builds it on the main thread before fleets are built in
+        the background; the table is only published once it's complete.
+        """
+        if cls.states:
+            return
+
+        images = []
         for i in range(1, 10):
-            enemy_color = image_color_dict[i]
-            image_file_name = enemy_color + '_enemy_ship.png'
-            image_path = os.path.join('images', image_file_name)
-            image = pygame.image.load(image_path).convert_alpha()
-            self.images.append(image) 
+            image_file_name = ENEMY_COLORS[i] + '_enemy_ship.png'
+            images.append(assets.image_and_mask(image_path(image_file_name)))
+        cls.occupancy = occupancy([mask_bits(mask) for _, mask in images])
+
+        # An enemy shows the image of its remaining life.
+        states = {}
+        for level in range(1, 10):
+            for life in range(1, level + 1):
+                image_index = min(life, len(images)) - 1
+                image, mask = images[image_index]
+                states[(level, life)] = EnemyState(image, mask, image_index)
+        cls.states = states
@@ -1,28 +1,143 @@
-import pygame
-import random
+import heapq
+import itertools
 
 
-class Event:
-    """This is a class for custom event."""
+class Scheduler:
+    """Timed events on the game's own clock, in a priority queue.
 
-    def __init__(self, id):
-        self.id = pygame.USEREVENT + id
+    The clock only moves when advance() is called, once per step while
+    the game is being played, so the events follow the simulation: they
+    stop while the game is paused or over, and fire on the same steps
+    however fast the game runs. Events due at the same time run in the
+    order they were scheduled.
+    """
 
-    def set_timer(self, base_time, random_time):
-        event_time = base_time + random.randint(-random_time, random_time)
-        pygame.time.set_timer(self.id, event_time)
+    def __init__(self):
+        self.now = 0
+        # Entries of [time, order, callback]; a cancelled (or run)
+        # entry has no callback, and is dropped when it comes up.
+        self.queue = []
+        self._order = itertools.count()
+        # The entries still to run, without the cancelled ones.
+        self.live = 0
+
+    def __len__(self):
+        return self.live
+
+    def schedule(self, delay, callback):
+        """Run callback() delay ms from now. Return the entry, to cancel
+        it."""
+        entry = [self.now + delay, next(self._order), callback]
+        heapq.heappush(self.queue, entry)
+        self.live += 1
+        return entry
+
+    def cancel(self, entry):
+        if entry[2] is not None:
+            entry[2] = None
+            self.live -= 1
+
+    def clear(self):
+        """Cancel every event."""
+        for entry in self.queue:
+            entry[2] = None
+        self.queue.clear()
+        self.live = 0
+
+    def advance(self, time):
+        """Move the clock time ms forward, running the events that come
+        due on the way."""
+        end = self.now + time
+        queue = self.queue
+        while queue and queue[0][0] <= end:
+            entry = heapq.heappop(queue)
+            event_time, _, callback = entry
+            if callback is not None:
+                # Cancelling it from now on does nothing.
+                entry[2] = None
+                self.live -= 1
+                self.now = event_time
+                callback()
+        self.now = end
+
+
+class Timer:
+    """Run callback every base_time ms, give or take random_time ms.
+
+    The interval is drawn again every time the timer fires.
+    """
+
+    def __init__(self, scheduler, callback, base_time, random_time, rng):
+        self.scheduler = scheduler
+        self.callback = callback
+        self.base_time = base_time
+        self.random_time = random_time
+        self.random = rng
+        self.entry = None
+
+    def start(self):
+        self.stop()
+        self._schedule()
+
+    def stop(self):
+        if self.entry:
+            self.scheduler.cancel(self.entry)
+            self.entry = None
+
+    def _schedule(self):
+        interval = self.base_time + self.random.randint(-self.random_time,
+                                                        self.random_time)
+        self.entry = self.scheduler.schedule(max(interval, 1), self._fire)
+
+    def _fire(self):
+        self._schedule()
+        self.callback()
 
 
 class Events:
-    """This is a class for all the custom events in the game."""
+    """This is a class for all the timed events in the game."""
 
     def __init__(self, ai_game):
         self.settings = ai_game.settings
+        self.random = ai_game.random
+        self.bullets = ai_game.bullets
+        self.scheduler = Scheduler()
+
+        self.enemy_shooting = Timer(
+            self.scheduler, ai_game._enemy_shoots,
+            self.settings.bullet_gen_time, self.settings.bullet_rand_gen_time,
+            self.random)
+        self.powerup_drop = Timer(
+            self.scheduler, ai_game._drop_powerup,
+            self.settings.powerup_gen_time,
+            self.settings.powerup_rand_gen_time, self.random)
+        self.start()
+
+    def start(self):
+        """Start the timers over, for a new game."""
+        self.scheduler.clear()
+        self.enemy_shooting.start()
+        self.powerup_drop.start()
+
+    def start_enemy_fire(self, fleet):
+        """Give every enemy of fleet its own fire timer, if
+        settings.enemy_fire_time is set."""
+        if not self.settings.enemy_fire_time:
+            return
+        for enemy in fleet:
+            timer = Timer(self.scheduler, None, self.settings.enemy_fire_time,
+                          self.settings.enemy_rand_fire_time, self.random)
+            timer.callback = self._enemy_fire(fleet, enemy, timer)
+            timer.start()
 
-        self.enemy_shooting = Event(self.settings.enemy_shooting_id)
-        self.enemy_shooting.set_timer(
-            self.settings.bullet_gen_time, self.settings.bullet_rand_gen_time)
+    def _enemy_fire(self, fleet, enemy, timer):
+        def fire():
+            if enemy in fleet:
+                self.bullets.fire_enemy_bullet(enemy)
+            else:
+                timer.stop()
+        return fire
 
-        self.powerup_drop = Event(self.settings.powerup_id)
-        self.powerup_drop.set_timer(
-            self.settings.powerup_gen_time, self.settings.powerup_rand_gen_time)
+    def advance(self, time):
+        """Run the events due in the next time ms of play."""
+        self.scheduler.advance(time)
@@ -0,0 +1,22 @@
+import os
+import tempfile
+
+
+def atomic_write(path, data):
+    """Write data to the file at path, all at once.
+
+    The data is written to a temporary file of its own and then swapped
+    in, so a reader (or a memory map) of the file never sees it half
+    written, and other processes can write it at the same time.
+    """
+    fd, temp_path = tempfile.mkstemp(dir=os.path.dirname(path) or '.',
+                                     suffix='.tmp')
+    try:
+        with os.fdopen(fd, 'wb') as file:
+            file.write(data)
+        # mkstemp makes it private to the user.
+        os.chmod(temp_path, 0o644)
+        os.replace(temp_path, path)
+    except BaseException:
+        os.remove(temp_path)
+        raise
@@ -0,0 +1,259 @@
+import numpy as np
+import pygame
+
+from broadphase import SpatialHash
+from bullet import round_coord, round_coords
+from enemy import Enemy
+
+
+class Fleet:
+    """A class to manage the fleet of enemies.
+
+    The position (the decimal left and top of its rect), size, image,
+    life and level of every enemy are rows in NumPy arrays, so the whole fleet is
+    moved, dropped and checked against the screen edges in single array
+    operations. The rows and the Enemy objects are kept in the order the
+    enemies were added.
+
+    Since the fleet moves as a whole, the enemies at the edges of its
+    bounding box stay the same until the fleet changes (an enemy is
+    added, removed, resized or placed on its own). Their rows are kept
+    in self.bounds, so checking the screen edges and the bottom doesn't
+    scan the whole fleet.
+    """
+
+    def __init__(self, ai_game, capacity=64):
+        """Create an empty fleet."""
+        self.screen = ai_game.screen
+        self.settings = ai_game.settings
+        self.screen_rect = self.screen.get_rect()
+        self.grid = SpatialHash(self.settings.collision_cell_size)
+        # The grid is rebuilt only after the fleet changed.
+        self.grid_changed = True
+        # The rows of the enemies at the edges of the fleet, or None if
+        # they have to be found again.
+        self.bounds = None
+        # How far the fleet moved in the last step, and dropped since.
+        self.moved_x = self.moved_y = 0
+        self.dropped = 0
+
+        self.enemies = []
+        self.x = np.zeros(capacity)
+        self.y = np.zeros(capacity)
+        self.width = np.zeros(capacity, dtype=int)
+        self.height = np.zeros(capacity, dtype=int)
+        # The index of every enemy's image in Enemy.occupancy.
+        self.image = np.zeros(capacity, dtype=int)
+        self.life = np.zeros(capacity, dtype=int)
+        self.level = np.zeros(capacity, dtype=int)
+
+    def __len__(self):
+        return len(self.enemies)
+
+    def __iter__(self):
+        return iter(self.enemies)
+
+    def __contains__(self, enemy):
+        index = enemy.index
+        return (index is not None and index < len(self.enemies)
+                and self.enemies[index] is enemy)
+
+    def sprites(self):
+        """Return a list of the enemies, like Group.sprites()."""
+        return list(self.enemies)
+
+    def _arrays(self):
+        return [self.x, self.y, self.width, self.height, self.image,
+                self.life, self.level]
+
+    def add(self, level):
+        """Add an enemy of level at (0, 0), and return it."""
+        index = len(self.enemies)
+        if index == len(self.x):
+            # Double the capacity of the arrays.
+            (self.x, self.y, self.width, self.height, self.image, self.life,
+             self.level) = [np.concatenate([array, np.zeros_like(array)])
+                            for array in self._arrays()]
+        self.x[index] = self.y[index] = 0
+        self.level[index] = self.life[index] = level
+        self.changed()
+        enemy = Enemy(self, index)
+        self.enemies.append(enemy)
+        return enemy
+
+    def add_at(self, x_idx, y_idx, level):
+        """Add an enemy of level at its place in the grid of the fleet,
+        and return it."""
+        enemy = self.add(level)
+        # Spacing between each enemy is equal to half an enemy width.
+        enemy_width, enemy_height = enemy.rect.size
+        enemy.x = enemy_width + 1.5 * enemy_width * x_idx
+        enemy.y = self.settings.fleet_y_start + enemy_height * y_idx
+        return enemy
+
+    def populate(self, level_data):
+        """Add the enemies of a level map, row by row."""
+        for y_idx, row in enumerate(level_data):
+            for x_idx, level in enumerate(row):
+                if level:
+                    self.add_at(x_idx, y_idx, level)
+
+    def take(self, other):
+        """Replace the enemies with those of other, a fleet built ahead
+        of time, which mustn't be used afterwards."""
+        (self.x, self.y, self.width, self.height, self.image, self.life,
+         self.level) = other._arrays()
+        self.enemies = other.enemies
+        for enemy in self.enemies:
+            enemy.fleet = self
+        self.grid_changed = True
+        self.bounds = other.bounds
+
+    def set_image(self, index, state):
+        """Give the enemy at index the size and image of state, an
+        EnemyState."""
+        self.width[index], self.height[index] = state.size
+        self.image[index] = state.image_index
+        self.changed()
+
+    def remove(self, enemy):
+        """Remove enemy from the fleet, if it's still in it."""
+        if enemy not in self:
+            return
+        index = enemy.index
+        n = len(self.enemies)
+        for array in self._arrays():
+            array[index:n - 1] = array[index + 1:n]
+        del self.enemies[index]
+        # Its row now belongs to the next enemy.
+        enemy.index = None
+        for enemy in self.enemies[index:]:
+            enemy.index -= 1
+        self.changed()
+
+    def empty(self):
+        """Remove all the enemies."""
+        for enemy in self.enemies:
+            enemy.index = None
+        self.enemies = []
+        self.changed()
+
+    def changed(self):
+        """Note that enemies were added, removed or moved on their own."""
+        self.grid_changed = True
+        self.bounds = None
+
+    def lefts(self):
+        """Return the left of the rect of every enemy."""
+        return round_coords(self.x[:len(self.enemies)])
+
+    def tops(self):
+        """Return the top of the rect of every enemy."""
+        return round_coords(self.y[:len(self.enemies)])
+
+    def rect(self, index):
+        """Return the rect of the enemy at index."""
+        rect = pygame.Rect(0, 0, self.width[index], self.height[index])
+        # Set the position like Rect attributes round it.
+        rect.x, rect.y = self.x[index], self.y[index]
+        return rect
+
+    def update(self):
+        """Move the whole fleet in its direction."""
+        n = len(self.enemies)
+        self.moved_x = self.settings.enemy_speed * self.settings.fleet_direction
+        self.x[:n] += self.moved_x
+        self.moved_y, self.dropped = self.dropped, 0
+        self.grid_changed = True
+
+    def drop(self):
+        """Drop the whole fleet."""
+        n = len(self.enemies)
+        self.y[:n] += self.settings.fleet_drop_speed
+        self.dropped += self.settings.fleet_drop_speed
+        self.grid_changed = True
+
+    def _find_bounds(self):
+        """Find the rows of the enemies at the edges of the fleet.
+
+        Moving every enemy by the same amount keeps the order of their
+        positions, and rounding keeps it too, so the leftmost enemy stays
+        the leftmost. For the right and bottom edges the size matters:
+        the enemy furthest right (or down) of every width (or height) is
+        kept.
+        """
+        n = len(self.enemies)
+        left = int(np.argmin(self.x[:n]))
+        return (left, self._furthest(self.x[:n], self.width[:n]),
+                self._furthest(self.y[:n], self.height[:n]))
+
+    @staticmethod
+    def _furthest(positions, sizes):
+        """Return the row of the largest position of every size."""
+        rows = np.lexsort((positions, sizes))
+        sorted_sizes = sizes[rows]
+        last = np.append(sorted_sizes[1:] != sorted_sizes[:-1], True)
+        return rows[last].tolist()
+
+    def bounding_box(self):
+        """Return the left, right and bottom of the rects of the fleet."""
+        if self.bounds is None:
+            self.bounds = self._find_bounds()
+        left, right, bottom = self.bounds
+        # There are only a few of these rows, so they're read one by one:
+        # NumPy costs more than it saves on arrays this short.
+        x, y = self.x.item, self.y.item
+        width, height = self.width.item, self.height.item
+        return (round_coord(x(left)),
+                max(round_coord(x(row)) + width(row) for row in right),
+                max(round_coord(y(row)) + height(row) for row in bottom))
+
+    def check_edges(self):
+        """Return True if any enemy is at the edge of the screen."""
+        if not self.enemies:
+            return False
+        left, right, _ = self.bounding_box()
+        return left <= 0 or right >= self.screen_rect.right
+
+    def check_bottom(self):
+        """Return True if any enemy reached the bottom of the screen."""
+        if not self.enemies:
+            return False
+        return self.bounding_box()[2] >= self.screen_rect.bottom
+
+    def build_grid(self):
+        """Fill the broadphase grid with the current rects of the fleet,
+        if it changed, and return their lefts and tops."""
+        if self.grid_changed:
+            n = len(self.enemies)
+            self.grid.build(self.lefts(), self.tops(), self.width[:n],
+                            self.height[:n])
+            self.grid_changed = False
+        return self.grid.lefts, self.grid.tops
+
+    def collide_any(self, sprite):
+        """Return the first enemy whose mask overlaps sprite's, or None."""
+        if not self.enemies:
+            return None
+        lefts, tops = self.build_grid()
+        rect = sprite.rect
+        for index in self.grid.query(rect).tolist():
+            offset = (rect.x - lefts[index], rect.y - tops[index])
+            if self.enemies[index].mask.overlap(sprite.mask, offset):
+                self.grid.hits += 1
+                return self.enemies[index]
+        return None
+
+    def draw(self, alpha=1):
+        """Draw the fleet alpha of the way from where it was a step ago,
+        and return the rects it covers."""
+        if alpha == 1:
+            lefts, tops = self.lefts(), self.tops()
+        else:
+            n, back = len(self.enemies), 1 - alpha
+            lefts = round_coords(self.x[:n] - back * self.moved_x)
+            tops = round_coords(self.y[:n] - back * self.moved_y)
+        lefts, tops = lefts.tolist(), tops.tolist()
+        return self.screen.blits(
+            [(enemy.image, (left, top))
+             for enemy, left, top in zip(self.enemies, lefts, tops)])
@@ -1,5 +1,14 @@
 import os
 
+# The states of the game.
+PLAYING = 'playing'
+RESPAWNING = 'respawning'
+LEVEL_TRANSITION = 'level transition'
+GAME_OVER = 'game over'
+WON = 'won'
+# The states during a game, when the Play button is hidden.
+IN_GAME = (PLAYING, RESPAWNING, LEVEL_TRANSITION)
+
 
 class GameStats:
     """Track statistics for Alien Invasion."""
@@ -10,7 +19,7 @@ class GameStats:
         self.reset_stats()
 
         # Start Alien Invasion in an inactive state.
-        self.game_active = False
+        self.set_state(GAME_OVER)
 
         # High score should never be reset.
         self.load_high_score_from_file()
@@ -20,9 +29,28 @@ class GameStats:
         self.ships_left = self.settings.ship_limit
         self.score = 0
         self.level = 1
-        self.win_game = False
         self.weapon_power = 1
 
+    def set_state(self, state, ends_at=None):
+        """Enter state. A timed state ends at the simulation time
+        ends_at (in ms)."""
+        self.state = state
+        self.state_ends_at = ends_at
+
+    @property
+    def game_active(self):
+        """True while a game is going on, even if it's paused."""
+        return self.state in IN_GAME
+
+    @property
+    def playing(self):
+        """True while the game moves and takes input."""
+        return self.state == PLAYING
+
+    @property
+    def win_game(self):
+        return self.state == WON
+
     def load_high_score_from_file(self):
         self.high_score = 0
         filename = self.settings.highscore_file
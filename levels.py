@@ -1,9 +1,42 @@
+import argparse
+import glob
+import mmap
 import os.path
+import re
+import struct
 from csv import reader
+from functools import lru_cache
+
+from files import atomic_write
+
+
+LEVELS_DIR = 'levels'
+PACK_PATH = os.path.join(LEVELS_DIR, 'levels.pack')
+
+# The levels of the game, level_1.csv to level_20.csv.
+MAX_LEVEL = 20
+
+# The shape of a level: up to 7 rows of 9 enemies, each the level of
+# the enemy (from 1 - 9), or 0 for no enemy.
+MAX_ROWS = 7
+COLUMNS = 9
+MAX_ENEMY_LEVEL = 9
+
+# The level pack starts with a header (magic, version, number of
+# levels), followed by an index entry for every level (level number,
+# number of rows, offset of its data) and the data of every level, one
+# byte per enemy.
+PACK_MAGIC = b'ALVL'
+PACK_VERSION = 1
+_HEADER = struct.Struct('<4sHH')
+_INDEX_ENTRY = struct.Struct('<HBI')
+
+# How many decoded levels are kept in memory.
+LEVEL_CACHE_SIZE = 8
 
 
 class LevelFileError(Exception):
-    """Level file doesn't exist."""
+    """Level file doesn't exist or isn't a valid level."""
     pass
 
 
@@ -15,27 +48,170 @@ def load_level_file(filepath):
         There are maximum 7 rows of aliens.
     """
     # Make sure file exist
-    if os.path.exists(filepath):
-        try:
-            with open(filepath, 'r') as read_obj:
-                csv_reader = reader(read_obj)
-                data_level = list(csv_reader)
-                data_level = [[int(j) for j in row] for row in data_level]
-        except:
-            print("level file couldn't be parsed")
-            data_level = [1 for _ in range(9)]
-    else:
+    if not os.path.exists(filepath):
         raise LevelFileError("the level file couldn't be found")
-    return data_level
+    with open(filepath, 'r') as read_obj:
+        data_level = [row for row in reader(read_obj) if row]
+    validate_level(data_level, filepath)
+    return [[int(j) for j in row] for row in data_level]
+
+
+def validate_level(rows, filepath):
+    """Raise LevelFileError if rows (lists of strings) aren't a level."""
+    if not 1 <= len(rows) <= MAX_ROWS:
+        raise LevelFileError(
+            f"{filepath}: {len(rows)} rows, expected 1 to {MAX_ROWS}")
+    for row_number, row in enumerate(rows, 1):
+        if len(row) != COLUMNS:
+            raise LevelFileError(
+                f"{filepath}, row {row_number}: {len(row)} columns, "
+                f"expected {COLUMNS}")
+        for value in row:
+            # Only ASCII digits: isdigit() also takes digits like '²',
+            # which int() rejects.
+            if not (re.fullmatch(r'[0-9]+', value.strip())
+                    and int(value) <= MAX_ENEMY_LEVEL):
+                raise LevelFileError(
+                    f"{filepath}, row {row_number}: {value!r} isn't an "
+                    f"enemy level from 0 to {MAX_ENEMY_LEVEL}")
+
+
+def level_files(levels_dir=LEVELS_DIR):
+    """Return the path of every level_*.csv, by level number."""
+    files = {}
+    for filepath in glob.glob(os.path.join(levels_dir, 'level_*.csv')):
+        match = re.fullmatch(r'level_(\d+)\.csv', os.path.basename(filepath))
+        if match:
+            files[int(match.group(1))] = filepath
+    return dict(sorted(files.items()))
+
+
+def build_level_pack(levels_dir=LEVELS_DIR, pack_path=PACK_PATH):
+    """Validate every level file and compile them into one level pack.
+
+    Nothing is written if any level isn't valid, or if any level from 1
+    to MAX_LEVEL has no file.
+    """
+    files = level_files(levels_dir)
+    missing = [number for number in range(1, MAX_LEVEL + 1)
+               if number not in files]
+    if missing:
+        raise LevelFileError(
+            f"{levels_dir}: no file for level "
+            f"{', '.join(str(number) for number in missing)}")
+    levels = {number: load_level_file(filepath)
+              for number, filepath in files.items()}
+    index = []
+    data = bytearray()
+    data_start = _HEADER.size + _INDEX_ENTRY.size * len(levels)
+    for number, rows in levels.items():
+        index.append(_INDEX_ENTRY.pack(number, len(rows),
+                                       data_start + len(data)))
+        for row in rows:
+            data.extend(row)
+    # An open pack (mapped in memory) never sees a half-written one.
+    header = _HEADER.pack(PACK_MAGIC, PACK_VERSION, len(levels))
+    atomic_write(pack_path, header + b''.join(index) + data)
+    return levels
+
+
+def pack_is_stale(levels_dir=LEVELS_DIR, pack_path=PACK_PATH):
+    """Return True if the level pack is missing or unreadable, holds
+    other levels than the level files (one was added or removed), or is
+    older than a level file."""
+    try:
+        pack = LevelPack(pack_path)
+    except (OSError, ValueError, struct.error, LevelFileError):
+        return True
+    packed = pack.index.keys()
+    pack.close()
+    files = level_files(levels_dir)
+    if packed != files.keys():
+        return True
+    pack_time = os.path.getmtime(pack_path)
+    return any(os.path.getmtime(filepath) > pack_time
+               for filepath in files.values())
+
+
+class LevelPack:
+    """A compiled level pack, memory-mapped and decoded level by level.
+
+    Only the header and the index are read when the pack is opened. A
+    level is decoded the first time it's asked for, and the last decoded
+    levels are cached, so restarting or replaying a level reads nothing
+    from disk.
+    """
+
+    def __init__(self, pack_path=PACK_PATH):
+        with open(pack_path, 'rb') as pack_file:
+            self.data = mmap.mmap(pack_file.fileno(), 0,
+                                  access=mmap.ACCESS_READ)
+        magic, version, count = _HEADER.unpack_from(self.data)
+        if magic != PACK_MAGIC or version != PACK_VERSION:
+            raise LevelFileError(f"{pack_path} isn't a level pack "
+                                 f"of version {PACK_VERSION}")
+        # (number of rows, offset) of every level.
+        self.index = {}
+        for i in range(count):
+            number, rows, offset = _INDEX_ENTRY.unpack_from(
+                self.data, _HEADER.size + i * _INDEX_ENTRY.size)
+            self.index[number] = (rows, offset)
+        self.level = lru_cache(maxsize=LEVEL_CACHE_SIZE)(self._decode)
+
+    def __contains__(self, level):
+        return level in self.index
+
+    def _decode(self, level):
+        """Return the rows of level, as tuples."""
+        if level not in self.index:
+            raise LevelFileError(f"there's no level {level} in the pack")
+        rows, offset = self.index[level]
+        return tuple(tuple(self.data[start:start + COLUMNS])
+                     for start in range(offset, offset + rows * COLUMNS,
+                                        COLUMNS))
+
+    def close(self):
+        self.data.close()
+
+
+_level_pack = None
+
+
+def level_pack():
+    """Return the level pack, building it first if it's missing or
+    stale. The game opens it on the main thread, before levels are
+    loaded in the background."""
+    global _level_pack
+    if _level_pack is None:
+        if pack_is_stale():
+            build_level_pack()
+        _level_pack = LevelPack()
+    return _level_pack
+
+
+def use_levels(levels_dir):
+    """Play the levels of levels_dir from now on, e.g. a variant of the
+    levels being balanced. Its pack is kept in the same folder."""
+    global _level_pack
+    pack_path = os.path.join(levels_dir, os.path.basename(PACK_PATH))
+    if pack_is_stale(levels_dir, pack_path):
+        build_level_pack(levels_dir, pack_path)
+    _level_pack = LevelPack(pack_path)
+
 
 def load_level_data(level):
-    """Returns the level data from the relevant csv file."""
-    filename = 'level_' + str(level) + '.csv'
-    filepath = os.path.join('levels', filename)
-    return load_level_file(filepath)
+    """Returns the rows of the level from the level pack."""
+    return level_pack().level(level)
+
 
 def main():
-    data_level = load_level_file('levels/demo_level.csv')
+    parser = argparse.ArgumentParser(description="Manage the level pack.")
+    parser.add_argument('command', choices=['build'],
+                        help='build: validate the level files and compile '
+                             f'them into {PACK_PATH}')
+    parser.parse_args()
+    levels = build_level_pack()
+    print(f"Wrote {len(levels)} levels to {PACK_PATH}")
 
 
 if __name__ == "__main__":
@@ -0,0 +1,37 @@
+import pygame
+
+from assets import assets, image_path
+
+
+class Lives:
+    """The row of ship icons at the top left, one for every ship left.
+
+    The icons are drawn once into a strip as long as the most ships the
+    player can have; showing a number of ships only changes how much of
+    the strip is drawn.
+    """
+
+    def __init__(self, ai_game):
+        self.screen = ai_game.screen
+        self.settings = ai_game.settings
+
+        self.icon = assets.image(image_path('ship.png'))
+        self.icon_width, icon_height = self.icon.get_size()
+        self.max_count = max(self.settings.max_ships, self.settings.ship_limit)
+        self.strip = pygame.Surface(
+            (self.icon_width * self.max_count, icon_height), pygame.SRCALPHA)
+        self.strip.blits([(self.icon, (self.icon_width * number, 0))
+                          for number in range(self.max_count)])
+
+        self.rect = pygame.Rect(10, 10, 0, icon_height)
+        self.count = 0
+
+    def update(self, count):
+        """Show count ships."""
+        self.count = max(0, min(count, self.max_count))
+        self.rect.width = self.icon_width * self.count
+
+    def draw(self):
+        """Draw the ships, and return the rect they cover."""
+        return self.screen.blit(self.strip, self.rect,
+                                (0, 0, self.rect.width, self.rect.height))
@@ -1,8 +1,7 @@
-import random
-import os.path
-import pygame
 from pygame.sprite import Sprite
 
+from assets import assets, image_path
+
 
 class Powerup(Sprite):
     """A class for upgrades being dropped from the top."""
@@ -13,12 +12,17 @@ class Powerup(Sprite):
         self.screen = ai_game.screen
         self.settings = ai_game.settings
         self.screen_rect = ai_game.screen.get_rect()
+        self.random = ai_game.random
 
-        self.image = pygame.image.load(imagepath).convert_alpha()
+        self.image, self.mask = assets.image_and_mask(imagepath)
         self.rect = self.image.get_rect()
+        self.reset()
+
+    def reset(self):
+        """Drop the powerup again from a random place at the top."""
         x_start = self.rect.width
         x_end = self.screen_rect.width - self.rect.width
-        self.x = random.randint(x_start, x_end)
+        self.x = self.random.randint(x_start, x_end)
         self.y = self.rect.height
         self.rect.x, self.rect.y = self.x, self.y
 
@@ -32,7 +36,7 @@ class LifePowerUp(Powerup):
     """A class for life powerup."""
 
     def __init__(self, ai_game):
-        imagepath = os.path.join('images', 'heart.png')
+        imagepath = image_path('heart.png')
         super().__init__(ai_game, imagepath)
 
 
@@ -40,7 +44,7 @@ class WeaponPowerUp(Powerup):
     """A class for weapon powerup."""
 
     def __init__(self, ai_game):
-        imagepath = os.path.join('images', 'weapon.png')  # TODO
+        imagepath = image_path('weapon.png')  # TODO
         super().__init__(ai_game, imagepath)
 
 
@@ -48,5 +52,101 @@ class ShieldPowerUp(Powerup):
     """A class for sheild powerup."""
 
     def __init__(self, ai_game):
-        imagepath = os.path.join('images', 'shield.png')  # TODO
+        imagepath = image_path('shield.png')  # TODO
         super().__init__(ai_game, imagepath)
+
+
+class Powerups:
+    """A class to manage the falling powerups.
+
+    Powerups that are taken or leave the screen go to a free list of
+    their kind, and are dropped again from there instead of creating
+    new sprites, so a long game doesn't keep allocating them.
+    """
+
+    def __init__(self, ai_game):
+        """Create an empty set of powerups."""
+        self.ai_game = ai_game
+        self.screen = ai_game.screen
+        self.settings = ai_game.settings
+        # The falling powerups, in the order they were dropped.
+        self.active = []
+        # The unused powerups of every kind.
+        self.free = {}
+        self.created = 0
+        self.reused = 0
+
+    def __len__(self):
+        return len(self.active)
+
+    def __iter__(self):
+        return iter(self.active)
+
+    def sprites(self):
+        """Return a list of the falling powerups, like Group.sprites()."""
+        return list(self.active)
+
+    def drop(self, kind):
+        """Drop a powerup of kind (e.g. LifePowerUp), and return it."""
+        free = self.free.get(kind)
+        if free:
+            powerup = free.pop()
+            powerup.reset()
+            self.reused += 1
+        else:
+            powerup = kind(self.ai_game)
+            self.created += 1
+        self.active.append(powerup)
+        return powerup
+
+    def remove(self, powerup):
+        """Take powerup out of the game, if it's still falling."""
+        if powerup in self.active:
+            self.active.remove(powerup)
+            self.free.setdefault(type(powerup), []).append(powerup)
+
+    def empty(self):
+        """Take all the powerups out of the game."""
+        for powerup in self.active:
+            self.free.setdefault(type(powerup), []).append(powerup)
+        self.active.clear()
+
+    def update(self):
+        """Move all the powerups down."""
+        for powerup in self.active:
+            powerup.update()
+
+    def cull(self):
+        """Take out the powerups that have left the screen, in place."""
+        active = self.active
+        bottom = self.settings.screen_height
+        kept = 0
+        for powerup in active:
+            if powerup.rect.top >= bottom:
+                self.free.setdefault(type(powerup), []).append(powerup)
+            else:
+                active[kept] = powerup
+                kept += 1
+        del active[kept:]
+
+    def pool_stats(self):
+        """Return the size of the pool and how often it was reused."""
+        dropped = self.created + self.reused
+        return {
+            'size': self.created,
+            'active': len(self.active),
+            'created': self.created,
+            'reused': self.reused,
+            'reuse_rate': self.reused / dropped if dropped else 0,
+        }
+
+    def draw(self, alpha=1):
+        """Draw the powerups alpha of the way from where they were a step
+        ago, and return the rects they cover."""
+        if alpha == 1:
+            return self.screen.blits(
+                [(powerup.image, powerup.rect) for powerup in self.active])
+        back = (1 - alpha) * self.settings.powerup_speed
+        return self.screen.blits(
+            [(powerup.image, (powerup.rect.x, round(powerup.y - back)))
+             for powerup in self.active])
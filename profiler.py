@@ -0,0 +1,226 @@
+import json
+from collections import deque
+from time import perf_counter
+
+import pygame
+
+from text import hud_font
+
+
+class _Stage:
+    """Times one stage of a frame, used as a context manager."""
+
+    def __init__(self, profiler, name):
+        self.profiler = profiler
+        self.name = name
+        self.start = 0
+
+    def __enter__(self):
+        self.start = perf_counter()
+
+    def __exit__(self, *exc_info):
+        self.profiler.add(self.name, self.start, perf_counter())
+
+
+class _NullStage:
+    """A stage that doesn't time anything."""
+
+    def __enter__(self):
+        pass
+
+    def __exit__(self, *exc_info):
+        pass
+
+
+class Profiler:
+    """Time the stages of every frame of the game.
+
+    Stages are named 'phase.detail' (e.g. 'collision.enemy_bullets'),
+    so the timings can be grouped by phase. All times are in seconds.
+    Only the last history frames are kept, or all of them if it's None.
+    """
+
+    enabled = True
+
+    def __init__(self, history=None):
+        self._stages = {}
+        self.frames = deque(maxlen=history)
+        # (start, end, [(stage, start, end), ...]) of every frame.
+        self.traces = deque(maxlen=history)
+        self.frame = {}
+        self.frame_stages = []
+        self.frame_start = 0
+
+    def stage(self, name):
+        """Return a context manager that times the stage name."""
+        stage = self._stages.get(name)
+        if stage is None:
+            stage = self._stages[name] = _Stage(self, name)
+        return stage
+
+    def add(self, name, start, end):
+        """Add a run of the stage name to the current frame."""
+        self.frame[name] = self.frame.get(name, 0) + end - start
+        self.frame_stages.append((name, start, end))
+
+    def start_frame(self):
+        self.frame = {}
+        self.frame_stages = []
+        self.frame_start = perf_counter()
+
+    def end_frame(self):
+        frame_end = perf_counter()
+        self.frame['frame'] = frame_end - self.frame_start
+        self.frames.append(self.frame)
+        self.traces.append((self.frame_start, frame_end, self.frame_stages))
+
+    def phases(self):
+        """Return the time of every phase, per frame, as a dict of lists."""
+        phases = {}
+        for frame_number, frame in enumerate(self.frames):
+            for name, duration in frame.items():
+                phase = name.split('.')[0]
+                times = phases.setdefault(phase, [0] * len(self.frames))
+                times[frame_number] += duration
+        return phases
+
+    def summary(self):
+        """Return the mean, p95 and p99 of every phase, in ms."""
+        return {phase: summarize(times)
+                for phase, times in sorted(self.phases().items())}
+
+    def write_trace(self, filename):
+        """Write the kept frames in the Chrome trace event format,
+        which chrome://tracing and Perfetto can open."""
+        trace_events = []
+        for frame_number, (start, end, stages) in enumerate(self.traces):
+            trace_events.append(_trace_event(
+                f'frame {frame_number}', start, end, 'frame'))
+            for name, stage_start, stage_end in stages:
+                trace_events.append(_trace_event(
+                    name, stage_start, stage_end))
+        with open(filename, 'w') as file_object:
+            json.dump({'traceEvents': trace_events,
+                       'displayTimeUnit': 'ms'}, file_object)
+
+
+class NullProfiler:
+    """A profiler that does nothing, used when profiling is off."""
+
+    enabled = False
+    _stage = _NullStage()
+
+    def stage(self, name):
+        return self._stage
+
+    def start_frame(self):
+        pass
+
+    def end_frame(self):
+        pass
+
+
+def _trace_event(name, start, end, category=None):
+    """Return a complete trace event, with times in microseconds."""
+    category = category or name.split('.')[0]
+    return {'name': name, 'cat': category, 'ph': 'X',
+            'ts': start * 1e6, 'dur': (end - start) * 1e6,
+            'pid': 0, 'tid': 0}
+
+
+def percentile(sorted_values, percent):
+    """Return the nearest-rank percentile of sorted values."""
+    if not sorted_values:
+        return 0
+    rank = max(1, -(-len(sorted_values) * percent // 100))
+    return sorted_values[int(rank) - 1]
+
+
+def summarize(times):
+    """Return the mean, p95 and p99 of times (in seconds), in ms."""
+    times = sorted(times)
+    mean = sum(times) / len(times) if times else 0
+    return {
+        'mean': mean * 1000,
+        'p95': percentile(times, 95) * 1000,
+        'p99': percentile(times, 99) * 1000,
+    }
+
+
+class ProfilerOverlay:
+    """Draw a rolling frame-time graph and per-stage bars over the game."""
+
+    def __init__(self, ai_game):
+        self.screen = ai_game.screen
+        self.settings = ai_game.settings
+        self.font = hud_font(20)
+        self.text_color = (230, 230, 230)
+        self.bar_color = (80, 200, 255)
+        self.graph_color = (120, 230, 120)
+        self.slow_color = (240, 80, 80)
+
+        # A translucent panel at the bottom left of the screen.
+        self.graph_frames = 180
+        self.graph_height = 60
+        self.rect = pygame.Rect(0, 0, self.graph_frames + 200, 280)
+        self.rect.bottomleft = self.screen.get_rect().bottomleft
+        self.panel = pygame.Surface(self.rect.size, pygame.SRCALPHA)
+        self.panel.fill((0, 0, 0, 160))
+
+        # Rendered stage names, so each is rasterized only once.
+        self.labels = {}
+        self.mean_image = None
+        self.draws = 0
+
+    def _label(self, text):
+        label = self.labels.get(text)
+        if label is None:
+            label = self.font.render(text, True, self.text_color)
+            self.labels[text] = label
+        return label
+
+    def draw(self, profiler):
+        """Draw the timings of the last frames of profiler, and return
+        the rect of the overlay."""
+        self.screen.blit(self.panel, self.rect)
+        frames = list(profiler.frames)[-self.graph_frames:]
+        if not frames:
+            return self.rect
+
+        # Frame times, with a line at the budget of one frame.
+        budget = 1 / self.settings.FPS
+        left, bottom = self.rect.left + 10, self.rect.top + 10 + self.graph_height
+        scale = self.graph_height / (2 * budget)
+        for x, frame in enumerate(frames):
+            height = min(frame['frame'] * scale, self.graph_height)
+            color = self.graph_color if frame['frame'] <= budget else self.slow_color
+            pygame.draw.line(self.screen, color, (left + x, bottom),
+                             (left + x, bottom - height))
+        budget_y = bottom - budget * scale
+        pygame.draw.line(self.screen, self.text_color, (left, budget_y),
+                         (left + self.graph_frames, budget_y))
+        # Re-render the mean frame time twice a second.
+        if self.draws % (self.settings.FPS // 2) == 0:
+            mean_ms = sum(frame['frame'] for frame in frames) / len(frames) * 1000
+            self.mean_image = self.font.render(f'{mean_ms:.1f} ms', True,
+                                               self.text_color)
+        self.draws += 1
+        self.screen.blit(self.mean_image,
+                         (left + self.graph_frames + 10, bottom - 14))
+
+        # The mean time of every stage over the last frames, in ms.
+        stage_times = {}
+        for frame in frames:
+            for name, duration in frame.items():
+                if name != 'frame':
+                    stage_times[name] = stage_times.get(name, 0) + duration
+        y = bottom + 8
+        bar_scale = 150 / (budget * len(frames))
+        for name, total in sorted(stage_times.items()):
+            if y > self.rect.bottom - 12:
+                break
+            self.screen.blit(self._label(name), (left, y))
+            width = max(1, min(total * bar_scale, 150))
+            self.screen.fill(self.bar_color, (left + 170, y + 3, width, 7))
+            y += 12
+        return self.rect
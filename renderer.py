@@ -0,0 +1,141 @@
+import pygame
+
+
+class Renderer:
+    """Draw a frame of the game, redrawing the whole screen."""
+
+    def __init__(self, ai_game):
+        self.ai_game = ai_game
+        self.screen = ai_game.screen
+        self.settings = ai_game.settings
+        self.screen_area = self.screen.get_width() * self.screen.get_height()
+
+        # Fill-rate statistics: frames drawn and pixels pushed to the
+        # display over all of them.
+        self.frames = 0
+        self.pixels = 0
+
+    def draw(self, alpha=1):
+        """Draw the frame and show it on the display, with everything
+        alpha of the way from where it was a step ago to where it is.
+        Return the rects covered by the things drawn over the
+        background."""
+        profiler = self.ai_game.profiler
+        with profiler.stage('render.sprites'):
+            self.screen.blit(self.settings.bg, (0, 0))
+            rects = self._draw_sprites(alpha)
+        with profiler.stage('hud.draw'):
+            rects.extend(self._draw_hud())
+        with profiler.stage('render.flip'):
+            pygame.display.flip()
+        self._count_pixels(self.screen_area)
+        return rects
+
+    def invalidate(self):
+        """Redraw the whole screen on the next frame."""
+
+    def fill_rate(self):
+        """Return the mean fraction of the screen pushed every frame."""
+        if not self.frames:
+            return 0
+        return self.pixels / (self.frames * self.screen_area)
+
+    def _count_pixels(self, pixels):
+        self.frames += 1
+        self.pixels += pixels
+
+    def _draw_sprites(self, alpha=1):
+        """Draw the ship, bullets, powerups and enemies, and return the
+        rects they cover."""
+        ai_game = self.ai_game
+        rects = [ai_game.ship.blitme(alpha)]
+        rects.extend(ai_game.bullets.draw(alpha))
+        rects.extend(ai_game.powerups.draw(alpha))
+        rects.extend(ai_game.enemies.draw(alpha))
+        return rects
+
+    def _draw_hud(self):
+        """Draw the score information, the play button and the overlay,
+        and return the rects they cover."""
+        ai_game = self.ai_game
+        # Draw the score information.
+        rects = ai_game.sb.show_score()
+
+        # Draw the play button if the game is inactive.
+        if not ai_game.stats.game_active:
+            pygame.mouse.set_visible(True)
+            rects.append(ai_game.play_button.draw_button())
+            # Draw winning if won the game
+            if ai_game.stats.win_game:
+                rects.append(ai_game.sb.show_winning_text())
+
+        if ai_game.profiler_overlay:
+            rects.append(ai_game.profiler_overlay.draw(ai_game.profiler))
+        return rects
+
+
+class DirtyRectRenderer(Renderer):
+    """Draw a frame of the game, redrawing only the regions that changed.
+
+    The regions covered in the last frame are restored from the
+    background, everything is drawn again, and only the regions covered
+    in the last or in this frame are pushed to the display.
+    """
+
+    def __init__(self, ai_game):
+        super().__init__(ai_game)
+        self.screen_rect = self.screen.get_rect()
+        self.last_rects = []
+        self.full_redraw = True
+
+    def invalidate(self):
+        self.full_redraw = True
+
+    def draw(self, alpha=1):
+        if self.full_redraw:
+            self.last_rects = self._clip(super().draw(alpha))
+            self.full_redraw = False
+            return self.last_rects
+
+        profiler = self.ai_game.profiler
+        bg = self.settings.bg
+        with profiler.stage('render.sprites'):
+            for rect in self.last_rects:
+                self.screen.blit(bg, rect, rect)
+            rects = self._draw_sprites(alpha)
+        with profiler.stage('hud.draw'):
+            rects.extend(self._draw_hud())
+        rects = self._clip(rects)
+
+        with profiler.stage('render.flip'):
+            dirty_rects = self._merge(self.last_rects, rects)
+            pygame.display.update(dirty_rects)
+        self._count_pixels(sum(rect.w * rect.h for rect in dirty_rects))
+        self.last_rects = rects
+        return rects
+
+    def _merge(self, last_rects, rects):
+        """Return the regions to update: every rect joined with a rect of
+        the last frame it overlaps (usually the same sprite a few pixels
+        away), and the rest of the last rects."""
+        last_rects = list(last_rects)
+        dirty_rects = []
+        for rect in rects:
+            index = rect.collidelist(last_rects)
+            if index == -1:
+                dirty_rects.append(rect)
+            else:
+                dirty_rects.append(rect.union(last_rects.pop(index)))
+        dirty_rects.extend(last_rects)
+        return dirty_rects
+
+    def _clip(self, rects):
+        """Return the parts of rects that are on the screen."""
+        screen_rect = self.screen_rect
+        return [rect.clip(screen_rect) for rect in rects]
+
+
+def create_renderer(ai_game):
+    """Return the renderer selected by settings.render_mode."""
+    renderers = {'full': Renderer, 'dirty': DirtyRectRenderer}
+    return renderers[ai_game.settings.render_mode](ai_game)
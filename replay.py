@@ -0,0 +1,131 @@
+"""Record a game session and replay it exactly.
+
+Everything random in the game comes from the game's own random.Random,
+seeded at startup, and the timers run on the simulation time, so a
+session is fully described by its seed and the input events of every
+frame. That's what a recording holds, in a compact binary log:
+
+    header: magic, version, flags (started, autopilot), seed, number of
+            frames
+    records: (frame, kind, a, b), e.g. (120, KEY_DOWN, K_SPACE, 0)
+             or (8, MOUSE_DOWN, x, y)
+"""
+import struct
+
+import pygame
+
+LOG_MAGIC = b'AIRP'
+LOG_VERSION = 2
+_HEADER = struct.Struct('<4sHBQI')
+_RECORD = struct.Struct('<IBIH')
+
+# The game was already started when the recording began.
+STARTED = 1
+# The autopilot played; its moves follow from the game, and aren't
+# recorded.
+AUTOPILOT = 2
+
+# The kinds of records.
+KEY_DOWN = 1
+KEY_UP = 2
+MOUSE_DOWN = 3
+
+# Keys that don't change the game (profiling), never recorded and
+# always live during a replay.
+UI_KEYS = (pygame.K_F3, pygame.K_F4)
+
+
+class ReplayError(Exception):
+    """The file isn't a recording this version can replay."""
+    pass
+
+
+class Recorder:
+    """Write the input events of a game to a log file.
+
+    The recording must start before the first frame of the game.
+    """
+
+    def __init__(self, filename, seed, started=False, autopilot=False):
+        self.file = open(filename, 'wb')
+        self.seed = seed
+        self.flags = ((STARTED if started else 0)
+                      | (AUTOPILOT if autopilot else 0))
+        self.records = 0
+        self._write_header(0)
+
+    def _write_header(self, frames):
+        self.file.write(_HEADER.pack(LOG_MAGIC, LOG_VERSION, self.flags,
+                                     self.seed, frames))
+
+    def record(self, frame, events):
+        """Record the events that affect the game, out of the events
+        of frame."""
+        for event in events:
+            record = self._encode(event)
+            if record:
+                self.file.write(_RECORD.pack(frame, *record))
+                self.records += 1
+
+    def _encode(self, event):
+        """Return (kind, a, b) for event, or None to leave it out."""
+        if event.type in (pygame.KEYDOWN, pygame.KEYUP):
+            if event.key in UI_KEYS:
+                return None
+            kind = KEY_DOWN if event.type == pygame.KEYDOWN else KEY_UP
+            return kind, event.key, 0
+        if event.type == pygame.MOUSEBUTTONDOWN:
+            return (MOUSE_DOWN,) + tuple(event.pos)
+        return None
+
+    def close(self, frames):
+        """Finish the log after frames frames."""
+        self.file.seek(0)
+        self._write_header(frames)
+        self.file.close()
+
+
+class Replay:
+    """A recorded session, read from a log file."""
+
+    def __init__(self, seed, frames, records, started=False,
+                 autopilot=False):
+        self.seed = seed
+        self.frames = frames
+        self.started = started
+        self.autopilot = autopilot
+        # The records of every frame with events, as (kind, a, b).
+        self.records = {}
+        for frame, kind, a, b in records:
+            self.records.setdefault(frame, []).append((kind, a, b))
+
+    @classmethod
+    def load(cls, filename):
+        with open(filename, 'rb') as file_object:
+            data = file_object.read()
+        if len(data) < _HEADER.size:
+            raise ReplayError(f"{filename} is too short to be a recording")
+        magic, version, flags, seed, frames = _HEADER.unpack_from(data)
+        if magic != LOG_MAGIC or version != LOG_VERSION:
+            raise ReplayError(f"{filename} isn't a recording "
+                              f"of version {LOG_VERSION}")
+        body = data[_HEADER.size:]
+        body = body[:len(body) - len(body) % _RECORD.size]
+        return cls(seed, frames, _RECORD.iter_unpack(body),
+                   bool(flags & STARTED), bool(flags & AUTOPILOT))
+
+    def events(self, frame):
+        """Return the recorded events of frame, as pygame events."""
+        records = self.records.get(frame)
+        if not records:
+            return []
+        events = []
+        for kind, a, b in records:
+            if kind == KEY_DOWN:
+                events.append(pygame.event.Event(pygame.KEYDOWN, key=a))
+            elif kind == KEY_UP:
+                events.append(pygame.event.Event(pygame.KEYUP, key=a))
+            elif kind == MOUSE_DOWN:
+                events.append(pygame.event.Event(
+                    pygame.MOUSEBUTTONDOWN, pos=(a, b), button=1))
+        return events
@@ -1,7 +1,5 @@
-import pygame.font
-from pygame.sprite import Group
-
-from ship import Ship
+from lives import Lives
+from text import Text, hud_font
 
 
 class Scoreboard:
@@ -17,7 +15,13 @@ class Scoreboard:
 
         # Font settings for scoring information.
         self.text_color = (215, 215, 215)
-        self.font = pygame.font.SysFont(None, 48)
+        self.font = hud_font(48)
+        # Each line is only rendered again when its text changes.
+        self.score_text = Text(self.font, self.text_color)
+        self.high_score_text = Text(self.font, self.text_color)
+        self.level_text = Text(self.font, self.text_color)
+        self.winning_line = Text(self.font, self.text_color)
+        self.lives = Lives(ai_game)
 
         # Prepare the initial score image.
         self.prep_images()
@@ -33,8 +37,7 @@ class Scoreboard:
         """Turn the score into a rendered image."""
         rounded_score = round(self.stats.score, -1)
         score_str = "{:,}".format(rounded_score)
-        self.score_image = self.font.render(score_str, True,
-                                            self.text_color)
+        self.score_image = self.score_text.render(score_str)
 
         # Display the score at the top right of the screen.
         self.score_rect = self.score_image.get_rect()
@@ -45,8 +48,7 @@ class Scoreboard:
         """Turn the high score into a rendered image."""
         high_score = round(self.stats.high_score, -1)
         high_score_str = "{:,}".format(high_score)
-        self.high_score_image = self.font.render(high_score_str, True,
-                                                 self.text_color)
+        self.high_score_image = self.high_score_text.render(high_score_str)
 
         # Display the score at the top right of the screen.
         self.high_score_rect = self.high_score_image.get_rect()
@@ -56,8 +58,7 @@ class Scoreboard:
     def prep_level(self):
         """Turn the level into a rendered image."""
         level_str = str(self.stats.level)
-        self.level_image = self.font.render(level_str, True,
-                                            self.text_color)
+        self.level_image = self.level_text.render(level_str)
 
         # Position the level below the score.
         self.level_rect = self.level_image.get_rect()
@@ -67,22 +68,24 @@ class Scoreboard:
     def prep_winning_text(self):
         """Render the winning text."""
         winning_text = "Congratulation! You Won!"
-        self.winning_image = self.font.render(winning_text, True,
-                                              self.text_color)
+        self.winning_image = self.winning_line.render(winning_text)
 
         self.winning_rect = self.winning_image.get_rect()
         self.winning_rect.centerx = self.ai_game.play_button.rect.centerx
         self.winning_rect.bottom = self.ai_game.play_button.rect.top - 200
 
     def show_winning_text(self):
-        self.screen.blit(self.winning_image, self.winning_rect)
+        return self.screen.blit(self.winning_image, self.winning_rect)
 
     def show_score(self):
-        """Draw score and level to the screen."""
-        self.screen.blit(self.score_image, self.score_rect)
-        self.screen.blit(self.high_score_image, self.high_score_rect)
-        self.screen.blit(self.level_image, self.level_rect)
-        self.ships.draw(self.screen)
+        """Draw score and level to the screen, and return where."""
+        rects = [
+            self.screen.blit(self.score_image, self.score_rect),
+            self.screen.blit(self.high_score_image, self.high_score_rect),
+            self.screen.blit(self.level_image, self.level_rect),
+        ]
+        rects.append(self.lives.draw())
+        return rects
 
     def check_high_score(self):
         """Chech to see if there's a new high score."""
@@ -92,9 +95,4 @@ class Scoreboard:
 
     def prep_ships(self):
         """Show how mnay ships are left."""
-        self.ships = Group()
-        for ship_number in range(self.stats.ships_left):
-            ship = Ship(self.ai_game)
-            ship.rect.x = 10 + ship_number * ship.rect.width
-            ship.rect.y = 10
-            self.ships.add(ship)
+        self.lives.update(self.stats.ships_left)
@@ -1,5 +1,8 @@
 import pygame
 
+from assets import assets, image_path
+from levels import MAX_LEVEL
+
 
 class Settings:
     """A class to store all settings for Alien Invasion."""
@@ -9,10 +12,25 @@ class Settings:
         # Screen settings
         self.screen_width = 1200
         self.screen_height = 800
+        # Shown until the background image is loaded.
+        self.bg_color = (0, 0, 0)
 
         # Game settings
+        # The simulation runs at FPS steps per second, whatever the
+        # display rate, and every speed is in pixels per step.
         self.FPS = 60
-        self.MAX_LEVEL = 20
+        # Length of one simulation step, in ms.
+        self.time_step = 1000 / self.FPS
+        # Frames drawn per second, 0 for the refresh rate of the display.
+        # Frames between two steps are interpolated.
+        self.render_fps = 0
+        # Most steps run to catch up after a slow frame.
+        self.max_steps_per_frame = 5
+        # Skip drawing frames (up to max_dropped_frames in a row) while
+        # the simulation is behind.
+        self.adaptive_rendering = True
+        self.max_dropped_frames = 4
+        self.MAX_LEVEL = MAX_LEVEL
 
         # Ship settings
         self.ship_limit = 3
@@ -33,20 +51,36 @@ class Settings:
         self.fleet_y_start = 90
         self.fleet_drop_speed = 10
 
-        # Events IDs
-        self.enemy_shooting_id = 1
-        self.powerup_id = 2
-
-
-        # Event times
+        # Event times, in ms of play. The random part is drawn again
+        # for every interval.
         self.bullet_gen_time = 2000  # in ms
         self.bullet_rand_gen_time = 200  # in ms
         self.powerup_gen_time = int(4E4)  # in ms
         self.powerup_rand_gen_time = int(1E1)  # in ms
+        # Every enemy fires on its own timer too, if set (0 for none).
+        self.enemy_fire_time = 0  # in ms
+        self.enemy_rand_fire_time = 1000  # in ms
+
+        # Pauses, in ms of simulation time
+        self.respawn_time = 500
+        # Between levels, 0 for none.
+        self.level_transition_time = 0
 
         # Powerup settings
         self.powerup_speed = 1.1
 
+        # Autopilot settings: how many steps ahead it looks for enemy
+        # bullets, and how wide a berth it gives them (in pixels).
+        self.autopilot_lookahead = 90
+        self.autopilot_margin = 8
+
+        # Sound settings: the mixer channels of every category of sound
+        # effects, and the shortest time between two plays of a sound
+        # (in ms of simulation time).
+        self.sound_channels = {'explosions': 4, 'ship': 1, 'level': 1}
+        self.sound_min_interval = {'boom': 80, 'ship_hit': 250,
+                                   'levelup': 500}
+
         # How quickly the game speeds up
         self.speedup_scale = 1.2
 
@@ -56,10 +90,38 @@ class Settings:
         # Highscore file
         self.highscore_file = 'highscore.txt'
 
+        # Size of the cells of the collision broadphase grids, in pixels.
+        # Sprites up to this size are the fastest to put in the grids.
+        self.collision_cell_size = 128
+
+        # Rendering: 'dirty' redraws only the regions that changed,
+        # 'full' redraws the whole screen every frame.
+        self.render_mode = 'dirty'
+
+        # Profiling settings
+        # Profiling starts on when the environment variable is set.
+        self.profile_env_var = 'ALIEN_PROFILE'
+        # Number of frames kept for the overlay and the trace file.
+        self.profile_history = 300
+        self.trace_file = 'frame_trace.json'
+
+        # Startup: the sounds and images not needed by the Play screen
+        # are loaded by these threads while it's shown (0 to load them
+        # all before the first frame).
+        self.asset_loader_threads = 2
+        # Load the images from the baked cache, baking it if needed.
+        self.use_asset_cache = True
+
         self.initialize_dynamic_settings()
 
     def load_bg(self):
-        self.bg = pygame.image.load("images/space_bg.jpg").convert()
+        self.bg = assets.image(bg_image_path(), alpha=False)
+
+    def blank_bg(self):
+        """Use a plain background until the image is loaded."""
+        self.bg = pygame.Surface(
+            (self.screen_width, self.screen_height)).convert()
+        self.bg.fill(self.bg_color)
 
     def initialize_dynamic_settings(self):
         """Initialize settings that change throghout the game."""
@@ -83,3 +145,7 @@ class Settings:
         self.enemy_speed *= self.speedup_scale
 
         self.enemy_points = int(self.enemy_points * self.score_scale)
+
+
+def bg_image_path():
+    return image_path('space_bg.jpg')
@@ -1,6 +1,7 @@
-import pygame
 from pygame.sprite import Sprite
 
+from assets import assets, image_path
+
 
 class Ship(Sprite):
     """A class to manage the ship."""
@@ -13,12 +14,13 @@ class Ship(Sprite):
         self.screen_rect = ai_game.screen.get_rect()
 
         # Load the ship image and get its rect.
-        self.image = pygame.image.load('images/ship.png').convert_alpha()
-        self.mask = pygame.mask.from_surface(self.image)
+        self._set_image('ship.png')
         self.rect = self.image.get_rect()
         self.shield = False
 
         self.center_ship()
+        # How far the ship moved in the last step.
+        self.moved_x = self.moved_y = 0
 
         # Movement flag
         self.moving_right = False
@@ -28,6 +30,7 @@ class Ship(Sprite):
 
     def update(self):
         """Update the ship's position based on the movement flag."""
+        x, y = self.x, self.y
         # Update the ship's x value, not the rect.
         if self.moving_right and self.rect.right < self.screen_rect.right:
             self.x += self.settings.ship_speed
@@ -41,15 +44,28 @@ class Ship(Sprite):
         # Update rect object from self.x.
         self.rect.x = self.x
         self.rect.y = self.y
+        self.moved_x, self.moved_y = self.x - x, self.y - y
+
+    def _set_image(self, filename):
+        """Show the image filename, and take its mask and occupancy, for
+        bullets hitting it."""
+        path = image_path(filename)
+        self.image, self.mask = assets.image_and_mask(path)
+        self.occupancy = assets.occupancy(path)
 
-    def blitme(self):
-        """Draw the ship at its current location."""
-        self.screen.blit(self.image, self.rect)
+    def blitme(self, alpha=1):
+        """Draw the ship alpha of the way from its last location to its
+        current one."""
+        if alpha == 1:
+            return self.screen.blit(self.image, self.rect)
+        back = 1 - alpha
+        return self.screen.blit(self.image, (
+            round(self.x - back * self.moved_x),
+            round(self.y - back * self.moved_y)))
 
     def create_shield(self):
         old_rect_center = self.rect.center
-        self.image = pygame.image.load('images/ship_shielded.png').convert_alpha()
-        self.mask = pygame.mask.from_surface(self.image)
+        self._set_image('ship_shielded.png')
         self.rect = self.image.get_rect()
         self.rect.center = old_rect_center
         self.x = self.rect.x
@@ -58,8 +74,7 @@ class Ship(Sprite):
 
     def remove_shield(self):
         old_rect_center = self.rect.center
-        self.image = pygame.image.load('images/ship.png').convert_alpha()
-        self.mask = pygame.mask.from_surface(self.image)
+        self._set_image('ship.png')
         self.rect = self.image.get_rect()
         self.rect.center = old_rect_center
         self.x = self.rect.x
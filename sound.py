@@ -2,11 +2,65 @@ import pygame.mixer
 import pygame.mixer_music
 
 
+# The file and the category of every sound effect. Every category plays
+# on its own pool of mixer channels (settings.sound_channels).
+SOUNDS = {
+    'boom': ('sounds/explosion.wav', 'explosions'),
+    'levelup': ('sounds/levelup.wav', 'level'),
+    'ship_hit': ('sounds/shiphit.wav', 'ship'),
+}
+
+
 class Sound:
-    """A class for all the sound in the game."""
+    """A class for all the sound in the game.
+
+    Sound effects are triggered with play(name) during a step and played
+    by update() at its end, so a sound triggered many times in a step is
+    played once (coalesced). A sound isn't played again sooner than
+    settings.sound_min_interval after its last play (rate-limited), and
+    a category steals its own oldest channel when all its channels are
+    busy, never another category's. The counters show what was played
+    and what was dropped; they're kept when the sound is disabled too.
+    """
+
+    def __init__(self, settings, enabled=True, loader=None):
+        """Load the music and the sound effects, on the executor loader
+        if it's given; until they're loaded, no sound is played."""
+        self.min_interval = settings.sound_min_interval
+        self.triggered = {}
+        # Simulation time of the last play of every sound.
+        self.last_played = {}
+        self.reset_counters()
+
+        # A disabled Sound never touches the mixer, e.g. when headless.
+        self.enabled = enabled
+        self.loaded = None
+        if not enabled:
+            return
 
-    def __init__(self):
         pygame.mixer.init()
+        self._reserve_channels(settings.sound_channels)
+        if loader:
+            self.loaded = loader.submit(self._load)
+        else:
+            self._load()
+
+    def _reserve_channels(self, channels):
+        """Give every category its own channels, out of reach of
+        Sound.play()."""
+        total = sum(channels.values())
+        pygame.mixer.set_num_channels(total)
+        pygame.mixer.set_reserved(total)
+        ids = iter(range(total))
+        self.channels = {
+            category: [pygame.mixer.Channel(next(ids)) for _ in range(count)]
+            for category, count in channels.items()}
+        # When every channel of a category started playing, to steal the
+        # oldest.
+        self.started = {channel: 0 for pool in self.channels.values()
+                        for channel in pool}
+
+    def _load(self):
         pygame.mixer.music.load('sounds/bg_music1.ogg')
         # Play the music indefinately
         pygame.mixer.music.play(loops=-1)
@@ -14,15 +68,67 @@ class Sound:
         pygame.mixer.music.set_volume(0.3)
 
         # Loading sound effects
-        self.boom_sound = pygame.mixer.Sound('sounds/explosion.wav')
-        self.levelup_sound = pygame.mixer.Sound('sounds/levelup.wav')
-        self.ship_hit_sound = pygame.mixer.Sound('sounds/shiphit.wav')
+        self.sounds = {name: pygame.mixer.Sound(filename)
+                       for name, (filename, _) in SOUNDS.items()}
+
+    def ready(self):
+        """Return True once the sounds are loaded."""
+        return self.loaded is None or self.loaded.done()
+
+    def wait(self):
+        """Wait until the sounds are loaded."""
+        if self.loaded:
+            self.loaded.result()
+            self.loaded = None
+
+    def play(self, name):
+        """Trigger the sound effect name, to be played at the end of the
+        step."""
+        self.triggers += 1
+        self.triggered[name] = self.triggered.get(name, 0) + 1
+
+    def update(self, now):
+        """Play the sounds triggered during the step ending at the
+        simulation time now (in ms)."""
+        if not self.triggered:
+            return
+        for name, count in self.triggered.items():
+            self.coalesced += count - 1
+            last = self.last_played.get(name)
+            if last is not None and now - last < self.min_interval[name]:
+                self.rate_limited += 1
+                continue
+            self.last_played[name] = now
+            self.played += 1
+            if self.enabled and self.loaded is None:
+                self._play_on_channel(name, now)
+        self.triggered.clear()
 
-    def play_boom_sound(self):
-        self.boom_sound.play()
+    def _play_on_channel(self, name, now):
+        pool = self.channels[SOUNDS[name][1]]
+        free = [channel for channel in pool if not channel.get_busy()]
+        if free:
+            channel = free[0]
+        else:
+            channel = min(pool, key=self.started.get)
+            self.stolen += 1
+        channel.play(self.sounds[name])
+        self.started[channel] = now
 
-    def play_levelup_sound(self):
-        self.levelup_sound.play()
+    def reset_counters(self):
+        self.triggers = 0
+        self.played = 0
+        self.coalesced = 0
+        self.rate_limited = 0
+        self.stolen = 0
 
-    def play_ship_hit_sound(self):
-        self.ship_hit_sound.play()
\ No newline at end of file
+    def counters(self):
+        """Return the counters as a dict: the triggers, the sounds
+        played and the triggers dropped."""
+        return {
+            'triggers': self.triggers,
+            'played': self.played,
+            'coalesced': self.coalesced,
+            'rate_limited': self.rate_limited,
+            'stolen': self.stolen,
+        }
@@ -0,0 +1,69 @@
+import pygame
+
+
+def display_refresh_rate(default=60):
+    """Return the refresh rate of the display, or default if it's not
+    known."""
+    try:
+        rates = pygame.display.get_desktop_refresh_rates()
+    except (AttributeError, pygame.error):
+        rates = []
+    return max(rates, default=0) or default
+
+
+class StepClock:
+    """Run the simulation at a fixed rate, whatever the display rate.
+
+    The wall time of every frame goes into an accumulator, and as many
+    steps of settings.time_step as fit in it are run. What's left, as a
+    fraction of a step, is alpha: how far the frame drawn is between the
+    last two steps. After a slow frame, up to settings.max_steps_per_frame
+    steps are run to catch up; the time past that is given up, and the
+    game slows down instead of falling further behind.
+
+    With settings.adaptive_rendering, frames aren't drawn while the
+    simulation is behind (up to settings.max_dropped_frames in a row),
+    so a slow renderer costs smoothness instead of game speed.
+    """
+
+    def __init__(self, settings):
+        self.time_step = settings.time_step
+        self.max_steps = settings.max_steps_per_frame
+        self.adaptive = settings.adaptive_rendering
+        self.max_dropped = settings.max_dropped_frames
+        self.lag = 0
+        self.dropped_in_a_row = 0
+
+        # Statistics: frames drawn and dropped, and simulation time
+        # given up (in ms).
+        self.drawn = 0
+        self.dropped = 0
+        self.lost_time = 0
+
+    def tick(self, elapsed):
+        """Add elapsed ms of wall time, and return the number of steps
+        to run."""
+        self.lag += elapsed
+        steps = min(int(self.lag // self.time_step), self.max_steps)
+        self.lag -= steps * self.time_step
+        return steps
+
+    def should_draw(self):
+        """Return True if the frame should be drawn, after its steps were
+        run."""
+        if self.lag >= self.time_step:
+            if self.adaptive and self.dropped_in_a_row < self.max_dropped:
+                self.dropped_in_a_row += 1
+                self.dropped += 1
+                return False
+            # Too far behind to catch up.
+            behind = self.lag - self.lag % self.time_step
+            self.lost_time += behind
+            self.lag -= behind
+        self.dropped_in_a_row = 0
+        self.drawn += 1
+        return True
+
+    @property
+    def alpha(self):
+        return self.lag / self.time_step
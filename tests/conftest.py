@@ -0,0 +1,19 @@
+import os
+import sys
+
+import pytest
+
+# The game runs from the repository root, without a window or audio.
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+os.chdir(ROOT)
+os.environ.setdefault('SDL_VIDEODRIVER', 'dummy')
+os.environ.setdefault('SDL_AUDIODRIVER', 'dummy')
+
+
+@pytest.fixture
+def game():
+    """A headless game, seeded, with everything loaded up front."""
+    from alien_invasion import AlienInvasion
+    return AlienInvasion(headless=True, seed=0, loader_threads=0,
+                         asset_cache=False)
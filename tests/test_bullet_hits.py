@@ -0,0 +1,86 @@
+"""The bullet hit test against the masks of the images."""
+import random
+
+import numpy as np
+import pygame
+import pytest
+
+from assets import assets, image_path
+from broadphase import rects_hit
+from bullet import ENEMY, PLAYER, Bullets
+from enemy import Enemy
+from fleet import Fleet
+
+
+@pytest.fixture
+def bullet_mask(game):
+    bullets = game.bullets
+    return pygame.mask.Mask((bullets.width, bullets.height), fill=True)
+
+
+def image_tables(image):
+    """Return the occupancy tables, the row and the mask of image: the
+    life of a level 9 enemy, or the file name of a ship image."""
+    if isinstance(image, int):
+        state = Enemy.states[(9, image)]
+        return Enemy.occupancy, state.image_index, state.mask
+    path = image_path(image)
+    return assets.occupancy(path)[None], 0, assets.mask(path)
+
+
+@pytest.mark.parametrize('image', [*range(1, 10), 'ship.png',
+                                   'ship_shielded.png'])
+def test_occupancy_matches_mask(game, bullet_mask, image):
+    """A bullet placed anywhere around or over the image hits it if and
+    only if it overlaps its mask."""
+    tables, row, mask = image_tables(image)
+    rng = random.Random(1)
+    width, height = bullet_mask.get_size()
+    mask_width, mask_height = mask.get_size()
+    placements = [(rng.randint(-width, mask_width),
+                   rng.randint(-height, mask_height)) for _ in range(5000)]
+    lefts, tops = np.array(placements).T
+
+    hit = rects_hit(tables, np.full(len(placements), row), lefts, tops,
+                    width, height)
+    expected = [mask.overlap(bullet_mask, placement) is not None
+                for placement in placements]
+    assert hit.tolist() == expected
+
+
+def test_collide_matches_masks(game, bullet_mask):
+    """Bullets.collide finds the hits of an overlap test of every bullet
+    with the mask of every enemy, on a full fleet of every level."""
+    rng = random.Random(1)
+    settings = game.settings
+    bullets = Bullets(game)
+    fleet = Fleet(game)
+    for y_idx in range(5):
+        for x_idx in range(9):
+            fleet.add_at(x_idx, y_idx, rng.randint(1, 9))
+
+    found = 0
+    for _ in range(20):
+        bullets.empty()
+        for enemy in fleet:
+            enemy.life = rng.randint(1, enemy.level)
+            enemy.update_image()
+        for _ in range(200):
+            bullets._rect.topleft = (
+                rng.randint(0, settings.screen_width),
+                rng.randint(0, settings.screen_height // 2))
+            bullets._add(rng.choice((PLAYER, ENEMY)), 0, 1)
+
+        expected = {}
+        lefts, tops, _, _ = bullets._rects(np.arange(bullets.count))
+        for i in np.flatnonzero(bullets.owner[:bullets.count] == PLAYER):
+            for enemy in fleet:
+                offset = (int(lefts[i]) - enemy.rect.x,
+                          int(tops[i]) - enemy.rect.y)
+                if enemy.mask.overlap(bullet_mask, offset):
+                    expected.setdefault(int(i), []).append(enemy.index)
+        collisions = bullets.collide(PLAYER, fleet)
+        assert {i: sorted(enemy.index for enemy in hit)
+                for i, hit in collisions.items()} == expected
+        found += len(expected)
+    assert found, "no bullet hit the fleet"
@@ -0,0 +1,45 @@
+"""An enemy hit by two bullets in one step is only hit once it's gone."""
+from bullet import PLAYER
+from enemy import Enemy
+
+
+def check_rows(fleet):
+    """Check that every enemy's row holds its index, life and image."""
+    for index, enemy in enumerate(fleet):
+        state = Enemy.states[(enemy.level, enemy.life)]
+        assert enemy.index == index
+        assert enemy.image is state.image
+        assert fleet.image[index] == state.image_index
+
+
+def test_second_bullet_spares_neighbour(game):
+    """Enemy a (life 1) is hit by two bullets in the same step, next to
+    enemy b. The first bullet kills a, and b moves into its row of the
+    fleet; the second bullet must not touch b's life or image."""
+    game._start_game()
+    game.enemies.empty()
+    game.bullets.empty()
+    a = game.enemies.add(1)
+    b = game.enemies.add(3)
+    a.x, a.y = 100, 100
+    b.x, b.y = 400, 100
+    # Two bullets in a, one above the other.
+    for top in (a.rect.top + 5, a.rect.top + 10):
+        game.bullets._rect.midtop = (a.rect.centerx, top)
+        game.bullets._add(PLAYER, 0, 1)
+    game._check_player_bullets_enemy_collisions()
+
+    assert a not in game.enemies and a.index is None
+    assert list(game.enemies) == [b]
+    assert b.life == 3
+    check_rows(game.enemies)
+
+
+def test_rows_match_enemies(game):
+    """After every step of an autopilot game, each enemy's life and
+    image match its row of the fleet."""
+    game.use_autopilot()
+    game._start_game()
+    for _ in range(5000):
+        game.step()
+        check_rows(game.enemies)
@@ -0,0 +1,40 @@
+"""The scheduler and its timers."""
+import random
+
+from events import Scheduler, Timer
+
+
+def test_len_counts_live_events():
+    scheduler = Scheduler()
+    ran = []
+    first = scheduler.schedule(10, lambda: ran.append(1))
+    second = scheduler.schedule(20, lambda: ran.append(2))
+    assert len(scheduler) == 2
+    scheduler.cancel(second)
+    scheduler.cancel(second)
+    assert len(scheduler) == 1
+    scheduler.advance(30)
+    assert ran == [1] and len(scheduler) == 0
+    # Cancelling an event that already ran changes nothing.
+    scheduler.cancel(first)
+    assert len(scheduler) == 0
+
+
+def test_timers_stopped_and_restarted():
+    """Stopping and restarting timers, or clearing the scheduler under
+    them, leaves one live event per running timer."""
+    scheduler = Scheduler()
+    rng = random.Random(0)
+    timers = [Timer(scheduler, lambda: None, 100, 50, rng) for _ in range(3)]
+    for timer in timers:
+        timer.start()
+    for _ in range(100):
+        rng.choice(timers).start()
+        rng.choice(timers).stop()
+        scheduler.advance(rng.randint(1, 200))
+        running = sum(timer.entry is not None for timer in timers)
+        assert len(scheduler) == running
+    scheduler.clear()
+    for timer in timers:
+        timer.stop()
+    assert len(scheduler) == 0
@@ -0,0 +1,53 @@
+"""The fleet's tracked bounding box against per-sprite scans."""
+import random
+
+import pytest
+
+from fleet import Fleet
+from levels import load_level_data
+from settings import Settings
+
+
+def scan(fleet):
+    """Return the bounding box, the edge check and the bottom check of
+    the fleet, from the rect of every enemy."""
+    rects = [enemy.rect for enemy in fleet]
+    box = (min(rect.left for rect in rects),
+           max(rect.right for rect in rects),
+           max(rect.bottom for rect in rects))
+    screen_rect = fleet.screen_rect
+    edges = any(rect.left <= 0 or rect.right >= screen_rect.right
+                for rect in rects)
+    bottom = any(rect.bottom >= screen_rect.bottom for rect in rects)
+    return box, edges, bottom
+
+
+@pytest.mark.parametrize('level', range(1, Settings().MAX_LEVEL + 1))
+def test_bounds_match_scan(game, level):
+    """Fly the fleet of level as in the game, bouncing off the edges and
+    dropping, while random enemies are damaged (which can change their
+    size) or shot down, until it's shot down or lands."""
+    rng = random.Random(level)
+    settings = game.settings
+    for _ in range(3):
+        settings.fleet_direction = rng.choice((-1, 1))
+        fleet = Fleet(game)
+        fleet.populate(load_level_data(level))
+        while fleet:
+            expected = scan(fleet)
+            assert (fleet.bounding_box(), fleet.check_edges(),
+                    fleet.check_bottom()) == expected
+            if expected[2]:
+                break
+
+            if expected[1]:
+                fleet.drop()
+                settings.fleet_direction *= -1
+            fleet.update()
+            if rng.random() < 0.05:
+                enemy = rng.choice(fleet.sprites())
+                enemy.life -= 1
+                if enemy.life <= 0 or rng.random() < 0.2:
+                    fleet.remove(enemy)
+                else:
+                    enemy.update_image()
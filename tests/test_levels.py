@@ -0,0 +1,67 @@
+"""Validating the level files and compiling the level pack."""
+import os
+import shutil
+
+import pytest
+
+from levels import (COLUMNS, LEVELS_DIR, MAX_LEVEL, LevelFileError,
+                    LevelPack, build_level_pack, level_files, pack_is_stale,
+                    validate_level)
+
+
+@pytest.fixture
+def levels_dir(tmp_path):
+    """A copy of the game's level files, and the path of its pack."""
+    for filepath in level_files(LEVELS_DIR).values():
+        shutil.copy(filepath, tmp_path)
+    return str(tmp_path), str(tmp_path / 'levels.pack')
+
+
+@pytest.mark.parametrize('value', ['0', '9', ' 3 '])
+def test_enemy_level_accepted(value):
+    validate_level([[value] + ['0'] * (COLUMNS - 1)], 'level_1.csv')
+
+
+@pytest.mark.parametrize('value', ['10', '-1', '', 'x', '²', '٣'])
+def test_enemy_level_rejected(value):
+    with pytest.raises(LevelFileError):
+        validate_level([[value] + ['0'] * (COLUMNS - 1)], 'level_1.csv')
+
+
+def test_pack_holds_every_level(levels_dir):
+    levels_dir, pack_path = levels_dir
+    assert pack_is_stale(levels_dir, pack_path)
+    build_level_pack(levels_dir, pack_path)
+    assert not pack_is_stale(levels_dir, pack_path)
+    pack = LevelPack(pack_path)
+    assert all(level in pack for level in range(1, MAX_LEVEL + 1))
+    pack.close()
+
+
+def test_pack_stale_when_level_added(levels_dir):
+    levels_dir, pack_path = levels_dir
+    build_level_pack(levels_dir, pack_path)
+    shutil.copy(os.path.join(levels_dir, f'level_{MAX_LEVEL}.csv'),
+                os.path.join(levels_dir, f'level_{MAX_LEVEL + 1}.csv'))
+    # Not newer than the pack: only the level numbers differ.
+    pack_time = os.path.getmtime(pack_path)
+    os.utime(os.path.join(levels_dir, f'level_{MAX_LEVEL + 1}.csv'),
+             (pack_time - 10, pack_time - 10))
+    assert pack_is_stale(levels_dir, pack_path)
+
+
+def test_pack_stale_and_not_built_when_level_removed(levels_dir):
+    levels_dir, pack_path = levels_dir
+    build_level_pack(levels_dir, pack_path)
+    os.remove(os.path.join(levels_dir, 'level_7.csv'))
+    assert pack_is_stale(levels_dir, pack_path)
+    with pytest.raises(LevelFileError, match='level 7'):
+        build_level_pack(levels_dir, pack_path)
+
+
+def test_pack_stale_when_unreadable(levels_dir):
+    levels_dir, pack_path = levels_dir
+    for contents in (b'', b'ALVL'):
+        with open(pack_path, 'wb') as pack_file:
+            pack_file.write(contents)
+        assert pack_is_stale(levels_dir, pack_path)
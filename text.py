@@ -0,0 +1,39 @@
+import pygame.font
+
+
+# The font of every size in use, shared by the whole HUD.
+_fonts = {}
+
+
+def hud_font(size):
+    """Return the shared default font at size."""
+    font = _fonts.get(size)
+    if font is None:
+        font = pygame.font.SysFont(None, size)
+        _fonts[size] = font
+    return font
+
+
+class Text:
+    """A line of text in one font and color, rendered only when it
+    changes.
+
+    The font keeps the glyphs it has already rasterized, so rendering a
+    new string only composes them; an unchanged string costs nothing.
+    """
+
+    def __init__(self, font, color, background=None):
+        self.font = font
+        self.color = color
+        self.background = background
+        self.text = None
+        self.image = None
+
+    def render(self, text):
+        """Return the image of text, reusing the last one if text is the
+        same."""
+        if text != self.text:
+            self.text = text
+            self.image = self.font.render(text, True, self.color,
+                                          self.background)
+        return self.image